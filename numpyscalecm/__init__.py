@@ -0,0 +1,342 @@
+#  numpyscalecm
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+
+import bpy, bmesh
+from bpy.props import FloatProperty, BoolProperty, EnumProperty, IntProperty
+from mathutils import Vector
+import numpy as np
+from time import time
+from functools import partial
+import tracemalloc
+
+from . import centerofmass
+from .centerofmass import methods, mesh_topology, center_of_mass
+from .kernel import scale_rows
+from .executor import run_jobs
+from . import redocache
+
+bl_info = {
+	"name": "Numpy Scale",
+	"author": "Michel Anders (varkenvarken)",
+	"version": (0, 0, 202610182140),
+	"blender": (2, 92, 0),
+	"location": "View3D > Object > Numpy Scale, View3D > Mesh > Numpy Scale",
+	"description": "Scale around center of mass",
+	"warning": "",
+	"wiki_url": "",
+	"tracker_url": "",
+	"category": "Experimental development"}
+
+
+class RegularScaleOp(bpy.types.Operator):
+	bl_idname = 'mesh.regularscaleop'
+	bl_label = 'Regular Scale CM'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	scale : FloatProperty(name='Scale', default=1)
+	method : EnumProperty(name='Center of mass', items=methods)
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'OBJECT' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		# mesh must be in object mode
+		ob = context.active_object
+		start = time()
+		me = ob.data
+		count = len(me.vertices)
+		# calculate center of mass
+		if self.method == 'VERTEX':
+			cm = sum((v.co for v in me.vertices), Vector())
+			if count > 1:
+				cm /= count
+		else:
+			verts = np.empty(count*3, dtype=np.float32)
+			me.vertices.foreach_get('co', verts)
+			verts.shape = (count, 3)
+			cm, weight = center_of_mass(verts, self.method, mesh_topology(me))
+			cm = Vector(cm)
+		# scale the vertex coordinates
+		for v in me.vertices:
+			v.co = cm + (v.co - cm) * self.scale
+		print("{count} verts scaled in {t:.2f} seconds".format(
+					t=time()-start, count=count))
+		return {"FINISHED"}
+
+def selection_mask(me):
+	"""Return a boolean array that is True for selected, visible vertices."""
+	count = len(me.vertices)
+	select = np.empty(count, dtype=bool)
+	hide = np.empty(count, dtype=bool)
+	me.vertices.foreach_get('select', select)
+	me.vertices.foreach_get('hide', hide)
+	select &= ~hide
+	return select
+
+
+# scratch buffer for the stacked shape key coordinates, reused between calls
+scratch = np.empty(0, dtype=np.float32)
+
+def scale_shape_keys(me, cm, scale, mask=None, blocksize=0):
+	"""Scale the coordinates of all shape keys of a mesh around cm."""
+	global scratch
+	blocks = me.shape_keys.key_blocks
+	nkeys = len(blocks)
+	nverts = len(me.vertices)
+	size = nkeys * nverts * 3
+	if len(scratch) < size:
+		scratch = np.empty(size, dtype=np.float32)
+	flat = scratch[:size]
+	for k, block in enumerate(blocks):
+		block.data.foreach_get('co', flat[k*nverts*3:(k+1)*nverts*3])
+	# all keys as a single (nkeys, nverts, 3) array
+	stack = flat.reshape(nkeys, nverts, 3)
+	for key in stack:
+		scale_rows(key, cm, scale, mask, blocksize)
+	for k, block in enumerate(blocks):
+		block.data.foreach_set('co', flat[k*nverts*3:(k+1)*nverts*3])
+
+
+class NumpyScaleOp(bpy.types.Operator):
+	bl_idname = 'mesh.numpyscaleop'
+	bl_label = 'Numpy Scale CM'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	scale : FloatProperty(name='Scale', default=1)
+	selected : BoolProperty(name='All selected',
+		description='Scale all selected mesh objects (or all objects in edit mode) instead of just the active one',
+		default=False)
+	center : EnumProperty(
+		name='Center',
+		description='Point to scale around when scaling multiple objects',
+		items=[
+			('OBJECT', 'Per object', 'Scale each object around its own center of mass'),
+			('GLOBAL', 'Shared', 'Scale all objects around their combined center of mass')
+		])
+	method : EnumProperty(name='Center of mass', items=methods)
+	cache : BoolProperty(name='Cache for redo',
+		description='Keep the original coordinates so changing the scale in the redo panel is faster (uses more memory, not in chunked mode)',
+		default=True)
+	shape_keys : BoolProperty(name='Shape keys',
+		description='Scale the shape keys as well',
+		default=True)
+	chunked : BoolProperty(name='Chunked',
+		description='Limit the memory used for temporary arrays',
+		default=False)
+	chunk_size : IntProperty(name='Chunk size',
+		description='Number of vertices processed at once in chunked mode',
+		default=1 << 20, min=1024)
+	threads : IntProperty(name='Threads',
+		description='Number of threads for the array computations (0 = one per core)',
+		default=0, min=0)
+	memory : BoolProperty(name='Report memory',
+		description='Trace allocations and print the peak memory used on top of the vertex coordinates (slower)',
+		default=False)
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode in {'OBJECT', 'EDIT_MESH'} and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		start = time()
+		# in edit mode only the selected vertices are scaled. The
+		# selection is only visible in the mesh data in object mode
+		editmode = context.mode == 'EDIT_MESH'
+		if editmode:
+			obs = context.objects_in_mode if self.selected else [context.active_object]
+			bpy.ops.object.mode_set(mode='OBJECT')
+		elif self.selected:
+			obs = [ob for ob in context.selected_objects if ob.type == 'MESH']
+		else:
+			obs = [context.active_object]
+		# keep track of all memory we use, from the selection masks and
+		# the coordinate buffer to the cached copies and temporary arrays.
+		# A trace that is already running is left alone
+		tracing = self.memory and not tracemalloc.is_tracing()
+		if tracing:
+			tracemalloc.start()
+		# objects may share a mesh, which should be scaled only once.
+		# empty meshes (or empty selections) are skipped because
+		# they have no center of mass
+		unique = {}
+		masks = {}
+		for ob in obs:
+			ptr = ob.data.as_pointer()
+			if len(ob.data.vertices) and ptr not in unique:
+				if editmode:
+					masks[ptr] = selection_mask(ob.data)
+					if not masks[ptr].any():
+						continue
+				unique[ptr] = ob
+		obs = list(unique.values())
+		if not obs:
+			if tracing:
+				tracemalloc.stop()
+			if editmode:
+				bpy.ops.object.mode_set(mode='EDIT')
+			return {"CANCELLED"}
+		# get the vertex coordinates of all meshes in one buffer,
+		# each mesh occupying the rows offsets[i] : offsets[i+1]
+		counts = np.array([len(ob.data.vertices) for ob in obs])
+		offsets = np.zeros(len(obs) + 1, dtype=np.int64)
+		np.cumsum(counts, out=offsets[1:])
+		count = offsets[-1]
+		verts = np.empty(count*3, dtype=np.float32)
+		# a copy of the coordinates would defeat the memory limit of chunked mode
+		cache = self.cache and not self.chunked
+		entries = []
+		for ob, lo, hi in zip(obs, offsets[:-1], offsets[1:]):
+			# on a redo the original coordinates may still be in the cache
+			entry = None
+			if cache:
+				entry = redocache.lookup(ob.data, masks.get(ob.data.as_pointer()))
+			if entry is None:
+				ob.data.vertices.foreach_get('co', verts[lo*3:hi*3])
+				if cache:
+					entry = redocache.store(ob.data, verts[lo*3:hi*3].reshape(-1, 3),
+						masks.get(ob.data.as_pointer()))
+			else:
+				np.copyto(verts[lo*3:hi*3], entry.verts.reshape(-1))
+			entries.append(entry)
+		verts.shape = (count, 3)
+		mask = None
+		if editmode:
+			mask = np.concatenate([masks[ob.data.as_pointer()] for ob in obs])
+		blocksize = self.chunk_size if self.chunked else 0
+		# calculate the center of mass of every mesh
+		if cache and all(entry is not None and self.method in entry.centers for entry in entries):
+			cms = np.array([entry.centers[self.method][0] for entry in entries])
+			weights = np.array([entry.centers[self.method][1] for entry in entries])
+		elif self.method == 'VERTEX' and mask is None and self.threads == 1:
+			# in one go for the whole buffer
+			cms = np.add.reduceat(verts, offsets[:-1], axis=0, dtype=np.float64)
+			cms /= counts[:, np.newaxis]
+			weights = counts
+		else:
+			# one job per mesh, the topology is read on the main thread
+			cms = np.empty((len(obs), 3))
+			weights = np.empty(len(obs))
+			def read(i):
+				topology = None
+				if self.method != 'VERTEX':
+					topology = mesh_topology(obs[i].data)
+				lo, hi = offsets[i], offsets[i+1]
+				return (verts[lo:hi], self.method, topology,
+					None if mask is None else mask[lo:hi],
+					blocksize or centerofmass.BLOCKSIZE)
+			def compute(args):
+				return center_of_mass(*args)
+			def write(i, result):
+				cms[i], weights[i] = result
+			run_jobs([(partial(read, i), compute, partial(write, i))
+						for i in range(len(obs))], self.threads)
+		for entry, cm, weight in zip(entries, cms, weights):
+			if entry is not None:
+				entry.centers[self.method] = (cm.copy(), weight)
+		if self.center == 'GLOBAL':
+			# combine the centers in world space and convert the result
+			# back to the local coordinates of each object
+			mats = [np.array(ob.matrix_world) for ob in obs]
+			world = [m[:3,:3] @ cm + m[:3,3] for m, cm in zip(mats, cms)]
+			# areas and volumes grow with the object scale
+			# (this is exact only for uniformly scaled objects)
+			if self.method != 'VERTEX':
+				power = 2/3 if self.method == 'AREA' else 1
+				weights = weights * np.array(
+					[abs(np.linalg.det(m[:3,:3]))**power for m in mats])
+			gcm = np.average(world, axis=0, weights=weights)
+			for i, m in enumerate(mats):
+				inv = np.linalg.inv(m)
+				cms[i] = inv[:3,:3] @ gcm + inv[:3,3]
+		# scale the vertex coordinates of every mesh around its center,
+		# in place, and return the coordinates
+		cms = cms.astype(np.float32)
+		def read(i):
+			lo, hi = offsets[i], offsets[i+1]
+			return (verts[lo:hi], cms[i], self.scale,
+				None if mask is None else mask[lo:hi], blocksize)
+		def compute(args):
+			scale_rows(*args)
+		def write(i, result):
+			me = obs[i].data
+			lo, hi = offsets[i], offsets[i+1]
+			me.vertices.foreach_set('co', verts[lo:hi].reshape(-1))
+			if self.shape_keys and me.shape_keys:
+				scale_shape_keys(me, cms[i], self.scale,
+					None if mask is None else mask[lo:hi], blocksize)
+			me.update()
+			if entries[i] is not None:
+				redocache.expect_update(me)
+		run_jobs([(partial(read, i), compute, partial(write, i))
+					for i in range(len(obs))], self.threads)
+		if mask is not None:
+			count = np.count_nonzero(mask)
+		report = "{count} verts in {n} objects scaled in {t:.2f} seconds".format(
+					t=time()-start, count=count, n=len(obs))
+		if tracing:
+			# everything beyond the coordinates themselves
+			extra = tracemalloc.get_traced_memory()[1] - verts.nbytes
+			tracemalloc.stop()
+			report += ", {extra} bytes peak extra memory".format(extra=extra)
+		if editmode:
+			bpy.ops.object.mode_set(mode='EDIT')
+		print(report)
+		return {"FINISHED"}
+
+
+def menu_func(self, context):
+	self.layout.operator(
+		RegularScaleOp.bl_idname,
+		text=RegularScaleOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		NumpyScaleOp.bl_idname,
+		text=NumpyScaleOp.bl_label,
+		icon='PLUGIN')
+
+
+def menu_func_edit(self, context):
+	self.layout.operator(
+		NumpyScaleOp.bl_idname,
+		text=NumpyScaleOp.bl_label,
+		icon='PLUGIN')
+
+
+classes = [RegularScaleOp, NumpyScaleOp]
+
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+def register():
+	register_classes()
+	redocache.register()
+	bpy.types.VIEW3D_MT_object.append(menu_func)
+	bpy.types.VIEW3D_MT_edit_mesh.append(menu_func_edit)
+
+
+def unregister():
+	bpy.types.VIEW3D_MT_edit_mesh.remove(menu_func_edit)
+	bpy.types.VIEW3D_MT_object.remove(menu_func)
+	redocache.unregister()
+	unregister_classes()
+	global scratch
+	scratch = np.empty(0, dtype=np.float32)
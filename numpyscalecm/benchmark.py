@@ -0,0 +1,142 @@
+#  numpyscalecm/benchmark.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Compare the timings of the scale operators on grid meshes of
+# increasing size. Run it headless, for example:
+#
+#   blender --background --factory-startup --python numpyscalecm/benchmark.py -- --csv timings.csv
+#
+# Every row in the csv file contains the add-on version, so the
+# results of different versions can be collected in one file.
+
+import bpy
+import numpy as np
+from time import perf_counter
+from math import sqrt
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpyscalecm
+
+# name, variant, operator, properties
+variants = [
+	('RegularScaleOp', 'default', 'regularscaleop', {}),
+	('NumpyScaleOp', 'default', 'numpyscaleop', {'cache': False, 'threads': 1}),
+	('NumpyScaleOp', 'threads', 'numpyscaleop', {'cache': False, 'threads': 0}),
+	('NumpyScaleOp', 'chunked', 'numpyscaleop', {'cache': False, 'threads': 1, 'chunked': True}),
+	('NumpyScaleOp', 'area', 'numpyscaleop', {'cache': False, 'method': 'AREA'}),
+	('NumpyScaleOp', 'volume', 'numpyscaleop', {'cache': False, 'method': 'VOLUME'}),
+	('NumpyScaleOp', 'redo cache', 'numpyscaleop', {'cache': True}),
+]
+
+
+def grid_object(name, count):
+	"""Return a new object with a square grid mesh of about count vertices."""
+	side = max(2, int(round(sqrt(count))))
+	x, y = np.meshgrid(np.linspace(-1, 1, side), np.linspace(-1, 1, side))
+	co = np.column_stack([x.ravel(), y.ravel(), np.zeros(side*side)])
+	# one quad for every vertex that is not on the last row or column
+	r, c = np.meshgrid(np.arange(side - 1), np.arange(side - 1), indexing='ij')
+	a = (r * side + c).ravel()
+	quads = np.column_stack([a, a + 1, a + side + 1, a + side])
+	nquads = len(quads)
+	me = bpy.data.meshes.new(name)
+	me.vertices.add(side*side)
+	me.vertices.foreach_set('co', co.astype(np.float32).ravel())
+	me.loops.add(nquads * 4)
+	me.loops.foreach_set('vertex_index', quads.astype(np.int32).ravel())
+	me.polygons.add(nquads)
+	me.polygons.foreach_set('loop_start', np.arange(0, nquads * 4, 4, dtype=np.int32))
+	me.polygons.foreach_set('loop_total', np.full(nquads, 4, dtype=np.int32))
+	me.update(calc_edges=True)
+	ob = bpy.data.objects.new(name, me)
+	bpy.context.scene.collection.objects.link(ob)
+	return ob
+
+
+def run(sizes, runs, regular_max):
+	"""Return a list of result rows for all variants and sizes."""
+	version = '.'.join(str(v) for v in numpyscalecm.bl_info['version'])
+	rows = []
+	for size in sizes:
+		ob = grid_object('Benchmark', size)
+		count = len(ob.data.vertices)
+		bpy.context.view_layer.objects.active = ob
+		ob.select_set(True)
+		for name, variant, op, props in variants:
+			if name == 'RegularScaleOp' and count > regular_max:
+				continue
+			operator = getattr(bpy.ops.mesh, op)
+			times = []
+			for i in range(runs):
+				start = perf_counter()
+				operator(scale=1.0, **props)
+				times.append(perf_counter() - start)
+			median = float(np.median(times))
+			rows.append({
+				'version': version,
+				'operator': name,
+				'variant': variant,
+				'vertices': count,
+				'runs': runs,
+				'median': median,
+				'p95': float(np.percentile(times, 95)),
+				'verts_per_second': count / median if median > 0 else 0})
+		me = ob.data
+		bpy.data.objects.remove(ob)
+		bpy.data.meshes.remove(me)
+	return rows
+
+
+def main():
+	argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+	parser = argparse.ArgumentParser(description='Benchmark the Numpy Scale operators')
+	parser.add_argument('--csv', default='numpyscale_benchmark.csv',
+		help='file to write the timings to (appended to if it exists)')
+	parser.add_argument('--sizes', type=int, nargs='+',
+		default=[1000, 10000, 100000, 1000000, 10000000],
+		help='approximate number of vertices of the grid meshes')
+	parser.add_argument('--runs', type=int, default=5,
+		help='number of runs of every operator per size')
+	parser.add_argument('--regular-max', type=int, default=1000000,
+		help='largest mesh to run the (slow) RegularScaleOp on')
+	args = parser.parse_args(argv)
+
+	try:
+		numpyscalecm.register()
+	except ValueError:
+		pass  # already enabled as an add-on
+	rows = run(args.sizes, args.runs, args.regular_max)
+
+	exists = os.path.exists(args.csv)
+	with open(args.csv, 'a', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+		if not exists:
+			writer.writeheader()
+		writer.writerows(rows)
+	for row in rows:
+		print("{operator:15s} {variant:11s} {vertices:9d} verts median {median:.4f}s"
+			" p95 {p95:.4f}s {verts_per_second:.0f} verts/s".format(**row))
+
+
+if __name__ == "__main__":
+	main()
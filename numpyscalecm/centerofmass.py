@@ -0,0 +1,135 @@
+#  numpyscalecm/centerofmass.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Note: nothing in here imports bpy, meshes are only accessed
+# through their foreach_get() methods
+
+import numpy as np
+
+# the blender enum items for the supported ways to weigh a mesh
+methods = [
+	('VERTEX', 'Vertices', 'Average of the vertex positions'),
+	('AREA', 'Surface', 'Centroid of the surface, weighted by face area'),
+	('VOLUME', 'Volume', 'Centroid of the enclosed volume (mesh should be closed)')
+]
+
+# number of triangles (or masked rows) processed at once, to limit memory use
+BLOCKSIZE = 1 << 20
+
+
+def mesh_topology(me):
+	"""Return the loop_start, loop_total and vertex_index arrays of a mesh."""
+	npolys = len(me.polygons)
+	loop_start = np.empty(npolys, dtype=np.int32)
+	loop_total = np.empty(npolys, dtype=np.int32)
+	me.polygons.foreach_get('loop_start', loop_start)
+	me.polygons.foreach_get('loop_total', loop_total)
+	vertex_index = np.empty(len(me.loops), dtype=np.int32)
+	me.loops.foreach_get('vertex_index', vertex_index)
+	return loop_start, loop_total, vertex_index
+
+
+def fan_triangles(loop_start, loop_total, vertex_index):
+	"""Return an (n, 3) array of vertex indices of the fan triangulated polygons."""
+	ntris = loop_total.astype(np.int64) - 2
+	# for every triangle the first loop of its polygon and its position in the fan
+	first = np.repeat(loop_start, ntris)
+	k = np.arange(len(first)) - np.repeat(np.cumsum(ntris) - ntris, ntris)
+	tris = np.empty((len(first), 3), dtype=vertex_index.dtype)
+	tris[:,0] = vertex_index[first]
+	tris[:,1] = vertex_index[first + k + 1]
+	tris[:,2] = vertex_index[first + k + 2]
+	return tris
+
+
+def triangle_blocks(topology, blocksize=BLOCKSIZE):
+	"""Yield the fan triangles of a topology in blocks of about blocksize triangles.
+
+	The polygons are triangulated one block at a time, so no array
+	grows with the total number of triangles.
+	"""
+	loop_start, loop_total, vertex_index = topology
+	if len(loop_start) == 0:
+		return
+	# the number of polygons whose triangles fit in a block
+	step = max(1, blocksize // max(1, int(loop_total.max()) - 2))
+	for lo in range(0, len(loop_start), step):
+		yield fan_triangles(loop_start[lo:lo+step], loop_total[lo:lo+step], vertex_index)
+
+
+def masked_topology(topology, mask):
+	"""Return the topology restricted to polygons with all their vertices in mask."""
+	loop_start, loop_total, vertex_index = topology
+	if len(loop_start) == 0:
+		return topology
+	inside = np.logical_and.reduceat(mask[vertex_index], loop_start)
+	return loop_start[inside], loop_total[inside], vertex_index
+
+
+def masked_mean(verts, mask, blocksize=BLOCKSIZE):
+	"""Return the average of the rows of verts in mask and their number."""
+	total = np.zeros(3)
+	count = 0
+	for lo in range(0, len(verts), blocksize):
+		selected = verts[lo:lo+blocksize][mask[lo:lo+blocksize]]
+		total += selected.sum(axis=0, dtype=np.float64)
+		count += len(selected)
+	return total / max(count, 1), count
+
+
+def center_of_mass(verts, method='VERTEX', topology=None, mask=None, blocksize=BLOCKSIZE):
+	"""Return the center of mass of an (n, 3) array of coordinates and its weight.
+
+	The weight is the number of vertices, the surface area or the
+	volume, depending on the method, and can be used to combine
+	the centers of several meshes. The AREA and VOLUME methods need
+	the topology as returned by mesh_topology() and fall back to the
+	vertex average if the mesh has no area or volume. If a boolean
+	mask is given only the rows (and polygons) in the mask count.
+	Temporary arrays are limited to blocksize rows or triangles
+	(unless a single polygon has more triangles than that).
+	"""
+	if mask is None:
+		count = len(verts)
+		cm = verts.mean(axis=0, dtype=np.float64)
+	else:
+		cm, count = masked_mean(verts, mask, blocksize)
+	if method == 'VERTEX' or topology is None or count == 0:
+		return cm, count
+	if mask is not None:
+		topology = masked_topology(topology, mask)
+	total = 0.0
+	moment = np.zeros(3)
+	for block in triangle_blocks(topology, blocksize):
+		# relative to the vertex average to reduce round off errors
+		a = verts[block[:,0]] - cm
+		b = verts[block[:,1]] - cm
+		c = verts[block[:,2]] - cm
+		if method == 'AREA':
+			w = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+			centroids = (a + b + c) / 3
+		else:
+			# signed volumes of the tetrahedra formed with the reference point
+			w = np.einsum('ij,ij->i', a, np.cross(b, c)) / 6
+			centroids = (a + b + c) / 4
+		total += w.sum()
+		moment += w @ centroids
+	if abs(total) < 1e-12:
+		return cm, count
+	return cm + moment / total, abs(total)
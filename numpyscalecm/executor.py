@@ -0,0 +1,49 @@
+#  numpyscalecm/executor.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Numpy releases the GIL while it works on large arrays, so the
+# array part of a job can run in a thread while the main thread
+# reads the data for the next one. Blender data (bpy) may only be
+# touched from the main thread, so reading and writing stay there.
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+
+def run_jobs(jobs, workers=0):
+	"""Run a list of (read, compute, write) jobs.
+
+	read() is called on the main thread and its result is passed
+	to compute(), which runs in a worker thread. The result of
+	compute() is passed to write(), again on the main thread, in
+	the order of the jobs. workers=0 uses all cores, with a single
+	worker everything runs on the main thread.
+	"""
+	if workers <= 0:
+		workers = os.cpu_count() or 1
+	workers = min(workers, len(jobs))
+	if workers <= 1:
+		for read, compute, write in jobs:
+			write(compute(read()))
+		return
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		futures = [(pool.submit(compute, read()), write)
+					for read, compute, write in jobs]
+		for future, write in futures:
+			write(future.result())
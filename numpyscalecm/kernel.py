@@ -0,0 +1,49 @@
+#  numpyscalecm/kernel.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# An expression like cm + (verts - cm) * scale creates two temporary
+# arrays as big as verts itself. The functions here work in place
+# instead, using the out= argument of the numpy ufuncs.
+
+import numpy as np
+
+
+def scale_rows(verts, cm, scale, mask=None, blocksize=0):
+	"""Scale the rows of an (n, 3) float32 array in place around cm.
+
+	If a boolean mask is given only the rows in the mask are scaled.
+	Masked rows must be copied to be modified, a blocksize > 0 limits
+	such copies to blocksize rows at a time.
+	"""
+	scale = np.float32(scale)
+	# cm + (v - cm) * s == v * s + cm * (1 - s)
+	offset = (np.asarray(cm, dtype=np.float64) * (1 - float(scale))).astype(np.float32)
+	n = len(verts)
+	step = blocksize if blocksize > 0 else max(n, 1)
+	for lo in range(0, n, step):
+		block = verts[lo:lo+step]
+		if mask is None:
+			np.multiply(block, scale, out=block)
+			np.add(block, offset, out=block)
+		else:
+			blockmask = mask[lo:lo+step]
+			selected = block[blockmask]
+			np.multiply(selected, scale, out=selected)
+			np.add(selected, offset, out=selected)
+			block[blockmask] = selected
@@ -0,0 +1,135 @@
+#  numpyscalecm/redocache.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# When a property is changed in the redo panel (Adjust Last Operation)
+# Blender undoes the operator and executes it again. The original
+# coordinates and centers of mass are then the same as the previous
+# time, so we keep them around instead of reading them again. Only
+# the most recently used meshes are kept, so the copies of a few huge
+# meshes cannot pile up, and meshes that are too large by themselves
+# are not kept at all.
+
+import bpy
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+import numpy as np
+
+# the total number of vertices in all cached entries is kept below this
+MAXVERTICES = 10000000
+
+# (mesh pointer, vertex count) -> cached original state, least recently used first
+cache = OrderedDict()
+# meshes we changed ourselves, the depsgraph update that
+# follows should not evict them
+pending = set()
+
+# number of vertices checked to see if a mesh is still in its
+# original state (a new scale operation instead of a redo)
+NSAMPLES = 16
+
+
+class Entry:
+	def __init__(self, verts, mask):
+		self.verts = verts.copy()
+		self.mask = None if mask is None else mask.copy()
+		self.samples = np.linspace(0, len(verts) - 1, min(len(verts), NSAMPLES)).astype(int)
+		self.centers = {}
+
+
+def key(me):
+	return me.as_pointer(), len(me.vertices)
+
+
+def lookup(me, mask=None):
+	"""Return the cache entry of a mesh or None if it is missing or stale."""
+	entry = cache.get(key(me))
+	if entry is None:
+		return None
+	if (mask is None) != (entry.mask is None) or (
+		mask is not None and not np.array_equal(mask, entry.mask)):
+		return None
+	# after a redo the mesh is back in its original state, after
+	# a repeated scale operation it is not
+	vertices = me.vertices
+	for i in entry.samples:
+		if tuple(vertices[i].co) != tuple(entry.verts[i]):
+			del cache[key(me)]
+			return None
+	cache.move_to_end(key(me))
+	return entry
+
+
+def store(me, verts, mask=None):
+	"""Cache the original (n, 3) coordinates of a mesh and return the entry.
+
+	Meshes with more than MAXVERTICES vertices are not cached and
+	None is returned.
+	"""
+	if len(verts) > MAXVERTICES:
+		cache.pop(key(me), None)
+		return None
+	entry = Entry(verts, mask)
+	cache[key(me)] = entry
+	cache.move_to_end(key(me))
+	total = sum(len(e.verts) for e in cache.values())
+	while total > MAXVERTICES:
+		oldkey, oldentry = cache.popitem(last=False)
+		total -= len(oldentry.verts)
+	return entry
+
+
+def expect_update(me):
+	"""Mark a mesh as changed by us so the next depsgraph update keeps its entry."""
+	pending.add(me.as_pointer())
+
+
+@persistent
+def depsgraph_update(scene, depsgraph):
+	updated = set()
+	for update in depsgraph.updates:
+		if not update.is_updated_geometry:
+			continue
+		datablock = update.id.original
+		if isinstance(datablock, bpy.types.Object) and datablock.type == 'MESH':
+			updated.add(datablock.data.as_pointer())
+		elif isinstance(datablock, bpy.types.Mesh):
+			updated.add(datablock.as_pointer())
+	for ptr in updated:
+		if ptr in pending:
+			pending.discard(ptr)
+		else:
+			for k in [k for k in cache if k[0] == ptr]:
+				del cache[k]
+
+
+@persistent
+def clear(*args):
+	cache.clear()
+	pending.clear()
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+	bpy.app.handlers.load_post.append(clear)
+
+
+def unregister():
+	bpy.app.handlers.load_post.remove(clear)
+	bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+	clear()
@@ -19,22 +19,83 @@
 
 
 import bpy
+from bpy.props import EnumProperty
+import numpy as np
 
 bl_info = {
 	"name": "Select closest",
 	"author": "Michel Anders (varkenvarken)",
-	"version": (0, 0, 202105011536),
+	"version": (0, 0, 202610181800),
 	"blender": (2, 92, 0),
 	"location": "View3D > Select > Select closest",
 	"description": "Select a vertex closest to any vertex of other selected mesh objects",
 	"category": "Experimental development"}
 
 
+def coordinates(me, matrix=None):
+	"""Return the vertex coordinates of a mesh as an (n, 3) array, optionally transformed."""
+	count = len(me.vertices)
+	co = np.empty(count*3, dtype=np.float32)
+	me.vertices.foreach_get('co', co)
+	co = co.reshape(count, 3).astype(np.float64)
+	if matrix is not None:
+		m = np.array(matrix)
+		co = co @ m[:3,:3].T + m[:3,3]
+	return co
+
+
+def closest_pair(a, b, blocksize=256):
+	"""Return the indices of the closest pair of rows of a and b and their squared distance.
+
+	The matrix of all pairwise distances is never built, it is
+	evaluated in blocks of blocksize x blocksize and only the
+	running minimum is kept.
+	"""
+	best = (-1, -1, np.inf)
+	for alo in range(0, len(a), blocksize):
+		ablock = a[alo:alo+blocksize]
+		for blo in range(0, len(b), blocksize):
+			bblock = b[blo:blo+blocksize]
+			diff = ablock[:, np.newaxis, :] - bblock[np.newaxis, :, :]
+			d2 = np.einsum('ijk,ijk->ij', diff, diff)
+			i, j = np.unravel_index(np.argmin(d2), d2.shape)
+			if d2[i, j] < best[2]:
+				best = (alo + i, blo + j, d2[i, j])
+	return best
+
+
+def object_aabb(ob):
+	"""Return the world space (min, max) box around the vertices of a mesh object."""
+	# bound_box is that of the evaluated mesh, which only
+	# contains all original vertices if nothing moved them
+	if len(ob.modifiers) == 0 and ob.data.shape_keys is None:
+		co = np.array(ob.bound_box)
+		m = np.array(ob.matrix_world)
+		co = co @ m[:3,:3].T + m[:3,3]
+	else:
+		co = coordinates(ob.data, ob.matrix_world)
+	return co.min(axis=0), co.max(axis=0)
+
+
+def box_distance(a, b):
+	"""Return the smallest distance between any point in box a and any point in box b."""
+	gap = np.maximum(0, np.maximum(a[0] - b[1], b[0] - a[1]))
+	return np.sqrt(gap @ gap)
+
+
 class SelectClosestOp(bpy.types.Operator):
 	bl_idname = 'mesh.selectclosestop'
 	bl_label = 'Select closest'
 	bl_options = {'REGISTER', 'UNDO'}
 
+	engine : EnumProperty(
+		name='Engine',
+		description='How to find the closest vertex',
+		items=[
+			('NUMPY', 'Numpy', 'Compare all vertices at once with numpy, in blocks'),
+			('PYTHON', 'Python', 'Compare all vertices one by one (very slow)')
+		])
+
 	# only available in edit mode with some other mesh objects selected
 	@classmethod
 	def poll(self, context):
@@ -45,11 +106,15 @@ class SelectClosestOp(bpy.types.Operator):
 								- set([context.active_object])]))
 
 	def execute(self, context):
+		bpy.ops.object.editmode_toggle()
+		if self.engine == 'NUMPY':
+			self.select_closest_numpy(context)
+			bpy.ops.object.editmode_toggle()
+			return {"FINISHED"}
 		# this is about the *slowest* implementation you can imagine
 		# (see numpy recipes and bvhtree or kdtree for faster ways
 		# to check the closest vertex for many coordinates)
 		# but the focus here is on converting between coordinate systems
-		bpy.ops.object.editmode_toggle()
 		obverts = context.active_object.data.vertices
 		obmat = context.active_object.matrix_world
 		closest_vertex = None
@@ -73,6 +138,33 @@ class SelectClosestOp(bpy.types.Operator):
 		bpy.ops.object.editmode_toggle()
 		return {"FINISHED"}
 
+	def select_closest_numpy(self, context):
+		active = context.active_object
+		closest_vertex = -1
+		distance_squared = 1e30  # big
+		others = [ob for ob in set(context.selected_objects) - set([active])
+					if ob.type == 'MESH' and len(ob.data.vertices)]
+		if not (others and len(active.data.vertices)):
+			return
+		# unlike above we compare in world coordinates, so we can visit
+		# the other objects nearest bounding box first and stop when
+		# the next box is farther away than the closest vertex so far
+		activebox = object_aabb(active)
+		order = sorted(((box_distance(activebox, object_aabb(ob)), i)
+					for i, ob in enumerate(others)))
+		obverts = coordinates(active.data, active.matrix_world)
+		for boxdistance, i in order:
+			if boxdistance**2 > distance_squared:
+				break
+			ob = others[i]
+			otherverts = coordinates(ob.data, ob.matrix_world)
+			index, otherindex, d2 = closest_pair(obverts, otherverts)
+			if d2 < distance_squared:
+				distance_squared = d2
+				closest_vertex = index
+		if closest_vertex >= 0:
+			active.data.vertices[closest_vertex].select = True
+
 
 def menu_func(self, context):
 	self.layout.operator(
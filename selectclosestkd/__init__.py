@@ -0,0 +1,224 @@
+#  selectclosestkd
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+
+import bpy
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
+import numpy as np
+
+from . import kdcache, bvhcache
+from .planner import (sides, closest_vertex, within_distance, nearest_k,
+	vertex_distances, surface_distances)
+
+bl_info = {
+	"name": "Select closest kd",
+	"author": "Michel Anders (varkenvarken)",
+	"version": (0, 0, 202610182110),
+	"blender": (2, 93, 0),
+	"location": "View3D > Select > Select closest kd",
+	"description": "Select vertices closest to any vertex of other selected mesh objects using a kd tree",
+	"category": "Experimental development"}
+
+
+# the blender enum items for what to measure the distance to
+targets = [
+	('VERTICES', 'Vertices', 'Distance to the nearest vertex of the other objects'),
+	('SURFACE', 'Surface', 'Distance to the nearest point on a face of the other objects')
+]
+
+
+class SelectClosestKDOp(bpy.types.Operator):
+	bl_idname = 'mesh.selectclosestkdop'
+	bl_label = 'Select closest kd'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	mode : EnumProperty(
+		name='Select',
+		description='Which vertices to select',
+		items=[
+			('CLOSEST', 'Closest', 'Select the single closest vertex'),
+			('RADIUS', 'Within distance', 'Select all vertices within a distance of the other objects'),
+			('NEAREST', 'Nearest k', 'Select the k closest vertices')
+		])
+	target : EnumProperty(
+		name='Distance to',
+		description='Measure the distance to the vertices or to the faces of the other objects',
+		items=targets)
+	distance : FloatProperty(name='Distance', default=0.1, min=0, subtype='DISTANCE')
+	k : IntProperty(name='k', default=10, min=1)
+	side : EnumProperty(name='Tree over', items=sides)
+	parallel : BoolProperty(name='Worker processes', default=False,
+		description='Search for the closest vertex in separate processes (for meshes with millions of vertices)')
+	processes : IntProperty(name='Processes', default=0, min=0,
+		description='Number of worker processes (0 = one per core)')
+
+	# only available in edit mode with some other mesh objects selected
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' 
+			and context.active_object.type == 'MESH'
+			and any([o.type == 'MESH'
+						for o in set(context.selected_objects) 
+								- set([context.active_object])]))
+
+	def execute(self, context):
+		bpy.ops.object.editmode_toggle()
+		active = context.active_object
+		others = [ob for ob in set(context.selected_objects) - set([active])
+					if ob.type == 'MESH' and len(ob.data.vertices)]
+		me = active.data
+		if len(me.vertices) and others:
+			# the trees (in world coords) are cached between calls
+			count = len(me.vertices)
+			select = np.empty(count, dtype=bool)
+			me.vertices.foreach_get('select', select)
+			if self.target == 'SURFACE':
+				self.select_surface(context, active, others, select)
+			elif self.mode == 'CLOSEST':
+				index, distance = closest_vertex(active, others, self.side,
+					self.processes if self.parallel else None)
+				if index >= 0:
+					select[index] = True
+			elif self.mode == 'RADIUS':
+				select |= within_distance(active, others, self.distance, self.side)
+			else:
+				select[nearest_k(active, others, self.k, self.side)] = True
+			me.vertices.foreach_set('select', select)
+		bpy.ops.object.editmode_toggle()
+		# toggling edit mode is not a change that invalidates the tree
+		kdcache.expect_update(context.active_object.data)
+		return {"FINISHED"}
+
+	def select_surface(self, context, active, others, select):
+		# the trees are built from the evaluated meshes and cached
+		depsgraph = context.evaluated_depsgraph_get()
+		if self.mode == 'CLOSEST':
+			best = surface_distances(active, others, depsgraph, shrink=True)
+			index = np.argmin(best)
+			if np.isfinite(best[index]):
+				select[index] = True
+		elif self.mode == 'RADIUS':
+			select |= surface_distances(active, others, depsgraph, self.distance) <= self.distance
+		else:
+			best = surface_distances(active, others, depsgraph)
+			k = min(self.k, np.count_nonzero(np.isfinite(best)))
+			select[np.argsort(best, kind='stable')[:k]] = True
+
+
+class BakeDistanceOp(bpy.types.Operator):
+	"""Store the distance of every vertex to the other selected objects"""
+	bl_idname = 'object.bakedistanceop'
+	bl_label = 'Bake distance'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	name : StringProperty(name='Name', default='Distance',
+		description='Name of the attribute or vertex group')
+	layer : EnumProperty(
+		name='Store in',
+		items=[
+			('ATTRIBUTE', 'Attribute', 'A float vertex attribute with the distance'),
+			('VERTEX_GROUP', 'Vertex group', 'A vertex group with the distance divided by the clamp distance or the largest distance (slow)')
+		])
+	target : EnumProperty(name='Distance to', items=targets)
+	clamp : FloatProperty(name='Clamp', default=1.0, min=0, subtype='DISTANCE',
+		description='Vertices farther away get this distance, the search stops beyond it (0 = no limit)')
+
+	# only available in object mode with some other mesh objects selected
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'OBJECT'
+			and context.active_object is not None
+			and context.active_object.type == 'MESH'
+			and any([o.type == 'MESH'
+						for o in set(context.selected_objects)
+								- set([context.active_object])]))
+
+	def execute(self, context):
+		active = context.active_object
+		others = [ob for ob in set(context.selected_objects) - set([active])
+					if ob.type == 'MESH' and len(ob.data.vertices)]
+		me = active.data
+		if not len(me.vertices) or not others:
+			return {"CANCELLED"}
+		clamp = self.clamp if self.clamp > 0 else np.inf
+		if self.target == 'SURFACE':
+			distance = surface_distances(active, others, context.evaluated_depsgraph_get(), clamp)
+		else:
+			distance = vertex_distances(active, others, clamp)
+		if np.isfinite(clamp):
+			distance = np.minimum(distance, clamp)
+		else:
+			# nothing at all to measure the distance to
+			distance[~np.isfinite(distance)] = 0
+		if self.layer == 'ATTRIBUTE':
+			attribute = me.attributes.get(self.name)
+			if attribute is not None and (attribute.data_type != 'FLOAT' or attribute.domain != 'POINT'):
+				me.attributes.remove(attribute)
+				attribute = None
+			if attribute is None:
+				attribute = me.attributes.new(self.name, 'FLOAT', 'POINT')
+			attribute.data.foreach_set('value', distance.astype(np.float32))
+			me.update()
+			# a new attribute does not change the geometry the trees were built from
+			kdcache.expect_update(me)
+		else:
+			# weights are between 0 and 1, and there is no bulk
+			# access to vertex groups, so we add them one at a time
+			scale = clamp if np.isfinite(clamp) else distance.max()
+			weight = distance / scale if scale > 0 else distance
+			group = active.vertex_groups.get(self.name)
+			if group is None:
+				group = active.vertex_groups.new(name=self.name)
+			for i, w in enumerate(weight.tolist()):
+				group.add([i], w, 'REPLACE')
+		return {"FINISHED"}
+
+
+def menu_func(self, context):
+	self.layout.operator(
+		SelectClosestKDOp.bl_idname,
+		text=SelectClosestKDOp.bl_label,
+		icon='PLUGIN')
+
+
+def menu_func_object(self, context):
+	self.layout.operator(
+		BakeDistanceOp.bl_idname,
+		text=BakeDistanceOp.bl_label,
+		icon='PLUGIN')
+
+
+classes = [SelectClosestKDOp, BakeDistanceOp]
+
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+def register():
+	register_classes()
+	kdcache.register()
+	bvhcache.register()
+	bpy.types.VIEW3D_MT_select_edit_mesh.append(menu_func)
+	bpy.types.VIEW3D_MT_object.append(menu_func_object)
+
+
+def unregister():
+	bpy.types.VIEW3D_MT_object.remove(menu_func_object)
+	bpy.types.VIEW3D_MT_select_edit_mesh.remove(menu_func)
+	bvhcache.unregister()
+	kdcache.unregister()
+	unregister_classes()
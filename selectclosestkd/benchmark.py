@@ -0,0 +1,413 @@
+#  selectclosestkd/benchmark.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Compare the closest vertex engines on pairs of synthetic point clouds
+# of increasing size. The engines in the proximity package do not need
+# Blender, so outside Blender only those are run:
+#
+#   python selectclosestkd/benchmark.py --json proximity.json
+#
+# Run it headless in Blender to benchmark the operators as well:
+#
+#   blender --background --factory-startup --python selectclosestkd/benchmark.py -- --json proximity.json
+#
+# Every engine should find the same closest distance (the indices
+# may differ if there are ties); results that do not agree with the
+# exact engines are flagged and make the script exit with status 1.
+# Sheets are the only shape with faces, so the engines that measure
+# the distance to the surface only run on those. The two sheets are
+# parallel flat grids, so the exact distance to the surface of the
+# other one is simply the distance to its bounding box.
+# Peak memory is what tracemalloc sees: python and numpy allocations
+# in this process, not those of worker processes or mathutils trees.
+
+import numpy as np
+from time import perf_counter
+import tracemalloc
+import argparse
+import platform
+import json
+import ast
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+from proximity.bruteforce import closest_pair as brute_closest_pair, nearest as brute_nearest
+from proximity.closestpair import PointTree, closest_pair as tree_closest_pair
+from proximity import sharded
+
+try:
+	import bpy
+except ImportError:
+	bpy = None
+
+if bpy is not None:
+	sys.path.insert(0, os.path.dirname(HERE))
+	import selectclosestkd
+	import selectclosest
+	from selectclosestkd import kdcache, bvhcache
+
+
+def addon_version():
+	"""Return the version in the bl_info of the add-on, read without importing it."""
+	with open(os.path.join(HERE, '__init__.py')) as f:
+		tree = ast.parse(f.read())
+	for node in tree.body:
+		if isinstance(node, ast.Assign) and any(
+				getattr(target, 'id', None) == 'bl_info' for target in node.targets):
+			return '.'.join(str(v) for v in ast.literal_eval(node.value)['version'])
+	return None
+
+
+def points(shape, count, rng):
+	"""Return an (n, 3) array of points in or on a box from 0 to 1."""
+	if shape == 'sphere':
+		# uniform on the surface of a sphere with diameter 1
+		co = rng.normal(size=(count, 3))
+		co /= np.linalg.norm(co, axis=1)[:, None]
+		co = co * 0.5 + 0.5
+	elif shape == 'sheet':
+		# a square grid of about count vertices at a random height
+		side = max(2, int(round(np.sqrt(count))))
+		x, y = np.meshgrid(np.linspace(0, 1, side), np.linspace(0, 1, side), indexing='ij')
+		co = np.column_stack([x.ravel(), y.ravel(), np.full(side * side, rng.random())])
+	else:
+		co = rng.random((count, 3))
+	# blender stores coordinates as float32, round them so all engines see the same points
+	return co.astype(np.float32).astype(np.float64)
+
+
+def pair(shape, count, ratio, overlap, rng):
+	"""Return two point sets, the second moved along x so their boxes overlap by overlap (negative is a gap)."""
+	a = points(shape, count, rng)
+	b = points(shape, max(1, int(count * ratio)), rng)
+	b[:, 0] += 1 - overlap
+	return a, b
+
+
+def faces(shape, co):
+	"""Return the (m, 4) vertex indices of the quads of a sheet, or None for shapes without faces."""
+	if shape != 'sheet':
+		return None
+	side = int(round(np.sqrt(len(co))))
+	v = (np.arange(side - 1)[:, None] * side + np.arange(side - 1)).ravel()
+	return np.column_stack([v, v + side, v + side + 1, v + 1])
+
+
+def sheet_distances(co, sheet):
+	"""Return the distances of (n, 3) points to the surface of a sheet, given its vertices."""
+	gap = np.maximum(sheet.min(axis=0) - co, 0) + np.maximum(co - sheet.max(axis=0), 0)
+	return np.linalg.norm(gap, axis=1)
+
+
+def closest_to(a, b, candidates, target):
+	"""Return (index a, index b, distance) of the vertex of a among candidates closest to b.
+
+	With target 'SURFACE' b is a sheet and index b is -1.
+	"""
+	if target == 'SURFACE':
+		distance = sheet_distances(a[candidates], b)
+		k = int(np.argmin(distance))
+		return int(candidates[k]), -1, float(distance[k])
+	index, distance = brute_nearest(b, a[candidates])
+	k = int(np.argmin(distance))
+	return int(candidates[k]), int(index[k]), float(distance[k])
+
+
+# the engines that work on arrays, all return (build, query, (index a, index b, distance))
+
+def run_bruteforce(a, b, args):
+	start = perf_counter()
+	result = brute_closest_pair(a, b)
+	return 0.0, perf_counter() - start, result
+
+
+def run_dualtree(a, b, args):
+	start = perf_counter()
+	atree, btree = PointTree(a), PointTree(b)
+	built = perf_counter()
+	result = tree_closest_pair(atree, btree)
+	return built - start, perf_counter() - built, result
+
+
+def run_sheet(a, b, args):
+	start = perf_counter()
+	result = closest_to(a, b, np.arange(len(a)), 'SURFACE')
+	return 0.0, perf_counter() - start, result
+
+
+def run_sharded(a, b, args):
+	# the trees are built in the workers, as part of the query
+	start = perf_counter()
+	if len(a) >= len(b):
+		result = sharded.closest(b, a, args.processes)
+	else:
+		ib, ia, distance = sharded.closest(a, b, args.processes)
+		result = (ia, ib, distance)
+	return 0.0, perf_counter() - start, result
+
+
+# the engines that run an operator on the active object (a) with the other object (b) selected
+
+def run_operator(a, b, args, operator, props, cached=False, target='VERTICES'):
+	"""Run an operator on an empty selection and return the closest pair it selected.
+
+	With cached=True the operator runs twice, the second time with its
+	trees cached, and the difference is reported as the build time.
+	"""
+	times = []
+	for i in range(2 if cached else 1):
+		bpy.ops.mesh.select_all(action='DESELECT')
+		start = perf_counter()
+		operator(**props)
+		times.append(perf_counter() - start)
+	# the operator leaves edit mode to select, so the mesh is up to date
+	me = bpy.context.active_object.data
+	select = np.empty(len(me.vertices), dtype=bool)
+	me.vertices.foreach_get('select', select)
+	selected = np.flatnonzero(select)
+	if len(selected) == 0:
+		return 0.0, times[-1], (-1, -1, np.inf)
+	return times[0] - times[-1], times[-1], closest_to(a, b, selected[:1], target)
+
+
+def run_selectclosest(engine):
+	def run(a, b, args):
+		return run_operator(a, b, args, bpy.ops.mesh.selectclosestop, {'engine': engine})
+	return run
+
+
+def run_kd(props):
+	def run(a, b, args):
+		kdcache.clear()
+		bvhcache.clear()
+		return run_operator(a, b, args, bpy.ops.mesh.selectclosestkdop,
+			dict(props, processes=args.processes), cached=True, target=props.get('target', 'VERTICES'))
+	return run
+
+
+def run_bake(target):
+	"""Return an engine that bakes the distances and returns the vertex with the smallest one.
+
+	The bake runs twice, like the cached operators above.
+	"""
+	def run(a, b, args):
+		kdcache.clear()
+		bvhcache.clear()
+		bpy.ops.object.mode_set(mode='OBJECT')
+		times = []
+		for i in range(2):
+			start = perf_counter()
+			bpy.ops.object.bakedistanceop(name='BenchmarkDistance', layer='ATTRIBUTE', target=target, clamp=0)
+			times.append(perf_counter() - start)
+		me = bpy.context.active_object.data
+		distance = np.empty(len(me.vertices), dtype=np.float32)
+		me.attributes['BenchmarkDistance'].data.foreach_get('value', distance)
+		me.attributes.remove(me.attributes['BenchmarkDistance'])
+		bpy.ops.object.mode_set(mode='EDIT')
+		# the attribute is float32, so take the exact best of the (near) ties
+		candidates = np.flatnonzero(distance <= distance.min() * (1 + 1e-6) + 1e-6)
+		return times[0] - times[-1], times[-1], closest_to(a, b, candidates, target)
+	return run
+
+
+# name -> (function, needs bpy, exact, should it run for (na, nb, args), distance to)
+# the engines that measure the distance to the surface only run on sheets
+engines = {
+	'bruteforce': (run_bruteforce, False, True, lambda na, nb, args: na * nb <= args.brute_max, 'VERTICES'),
+	'dualtree': (run_dualtree, False, True, lambda na, nb, args: True, 'VERTICES'),
+	'sharded': (run_sharded, False, True, lambda na, nb, args: True, 'VERTICES'),
+	'sheet-exact': (run_sheet, False, True, lambda na, nb, args: True, 'SURFACE'),
+	'selectclosest-numpy': (run_selectclosest('NUMPY'), True, False, lambda na, nb, args: na * nb <= args.brute_max, 'VERTICES'),
+	'selectclosest-python': (run_selectclosest('PYTHON'), True, False, lambda na, nb, args: na * nb <= args.python_max, 'VERTICES'),
+	'kd-active': (run_kd({'side': 'ACTIVE'}), True, False, lambda na, nb, args: True, 'VERTICES'),
+	'kd-others': (run_kd({'side': 'OTHERS'}), True, False, lambda na, nb, args: True, 'VERTICES'),
+	'kd-dual': (run_kd({'side': 'DUAL'}), True, False, lambda na, nb, args: True, 'VERTICES'),
+	'kd-sharded': (run_kd({'parallel': True}), True, False, lambda na, nb, args: True, 'VERTICES'),
+	'kd-surface': (run_kd({'target': 'SURFACE'}), True, False, lambda na, nb, args: True, 'SURFACE'),
+	'bake-vertices': (run_bake('VERTICES'), True, False, lambda na, nb, args: True, 'VERTICES'),
+	'bake-surface': (run_bake('SURFACE'), True, False, lambda na, nb, args: True, 'SURFACE'),
+}
+
+
+def measure(run, a, b, args):
+	"""Return the median build and query time, the peak memory and the result of an engine."""
+	builds, queries = [], []
+	for i in range(args.runs):
+		build, query, result = run(a, b, args)
+		builds.append(build)
+		queries.append(query)
+	peak = None
+	if args.memory:
+		# a separate run, tracing allocations slows down python code a lot
+		tracemalloc.start()
+		try:
+			run(a, b, args)
+			peak = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+	return float(np.median(builds)), float(np.median(queries)), peak, result
+
+
+def mesh_object(name, co, quads=None):
+	"""Return a new mesh object with vertices at the (n, 3) coordinates and optionally (m, 4) quads."""
+	me = bpy.data.meshes.new(name)
+	me.vertices.add(len(co))
+	me.vertices.foreach_set('co', co.astype(np.float32).ravel())
+	if quads is not None:
+		me.loops.add(quads.size)
+		me.loops.foreach_set('vertex_index', quads.astype(np.int32).ravel())
+		me.polygons.add(len(quads))
+		me.polygons.foreach_set('loop_start', np.arange(0, quads.size, 4, dtype=np.int32))
+		me.polygons.foreach_set('loop_total', np.full(len(quads), 4, dtype=np.int32))
+	me.update(calc_edges=True)
+	ob = bpy.data.objects.new(name, me)
+	bpy.context.scene.collection.objects.link(ob)
+	return ob
+
+
+def setup_scene(a, b, shape):
+	"""Return the two mesh objects, the first active and in edit mode."""
+	if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+		bpy.ops.object.mode_set(mode='OBJECT')
+	for ob in bpy.context.selected_objects:
+		ob.select_set(False)
+	active = mesh_object('BenchmarkA', a, faces(shape, a))
+	other = mesh_object('BenchmarkB', b, faces(shape, b))
+	other.select_set(True)
+	active.select_set(True)
+	bpy.context.view_layer.objects.active = active
+	bpy.ops.object.mode_set(mode='EDIT')
+	return active, other
+
+
+def remove_scene(objects):
+	bpy.ops.object.mode_set(mode='OBJECT')
+	for ob in objects:
+		me = ob.data
+		bpy.data.objects.remove(ob)
+		bpy.data.meshes.remove(me)
+
+
+def run(args):
+	"""Return a list of result records for all engines, shapes, sizes and overlaps."""
+	rng = np.random.default_rng(args.seed)
+	version = addon_version()
+	records = []
+	for shape in args.shapes:
+		for size in args.sizes:
+			for overlap in args.overlap:
+				a, b = pair(shape, size, args.ratio, overlap, rng)
+				selected = [name for name in args.engines
+							if (bpy is not None or not engines[name][1])
+								and (shape == 'sheet' or engines[name][4] != 'SURFACE')
+								and engines[name][3](len(a), len(b), args)]
+				objects = setup_scene(a, b, shape) if bpy is not None and any(
+					engines[name][1] for name in selected) else []
+				case = []
+				for name in selected:
+					build, query, peak, (ia, ib, distance) = measure(engines[name][0], a, b, args)
+					case.append({
+						'version': version,
+						'engine': name,
+						'target': engines[name][4],
+						'shape': shape,
+						'points_a': len(a),
+						'points_b': len(b),
+						'overlap': overlap,
+						'build': build,
+						'query': query,
+						'peak_memory': peak,
+						'index_a': int(ia),
+						'index_b': int(ib),
+						'distance': float(distance)})
+					print("{engine:20s} {shape:6s} {points_a:8d} {points_b:8d} overlap {overlap:5.2f}"
+						" build {build:8.4f}s query {query:8.4f}s distance {distance:.6g}".format(**case[-1]))
+				if objects:
+					remove_scene(objects)
+				# the engines should agree with the exact ones on the distance
+				for target in ('VERTICES', 'SURFACE'):
+					results = [r for r in case if r['target'] == target]
+					if not results:
+						continue
+					exact = [r['distance'] for r in results if engines[r['engine']][2]]
+					reference = min(exact) if exact else min(r['distance'] for r in results)
+					for r in results:
+						r['agrees'] = bool(abs(r['distance'] - reference) <= 1e-6 * max(reference, 1e-6))
+				records.extend(case)
+	return records
+
+
+def main():
+	if bpy is not None:
+		argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+	else:
+		argv = sys.argv[1:]
+	parser = argparse.ArgumentParser(description='Benchmark the closest vertex engines')
+	parser.add_argument('--json', default='proximity_benchmark.json',
+		help='file to write the results to')
+	parser.add_argument('--sizes', type=int, nargs='+',
+		default=[1000, 10000, 100000, 1000000, 5000000],
+		help='number of points of the first point set')
+	parser.add_argument('--ratio', type=float, default=1.0,
+		help='size of the second point set relative to the first')
+	parser.add_argument('--overlap', type=float, nargs='+', default=[0.5],
+		help='overlap of the boxes around the point sets along x, 1 is complete, negative is a gap')
+	parser.add_argument('--shapes', nargs='+', default=['cloud', 'sphere', 'sheet'], choices=['cloud', 'sphere', 'sheet'],
+		help='points inside a box, on the surface of a sphere or on a flat grid with faces')
+	parser.add_argument('--engines', nargs='+', default=list(engines), choices=list(engines),
+		help='engines to run, those that need bpy only run inside Blender')
+	parser.add_argument('--runs', type=int, default=1,
+		help='number of runs of every engine per case')
+	parser.add_argument('--brute-max', type=float, default=1e8,
+		help='largest number of point pairs to compare by brute force')
+	parser.add_argument('--python-max', type=float, default=1e6,
+		help='largest number of point pairs for the (very slow) python engine of Select closest')
+	parser.add_argument('--processes', type=int, default=0,
+		help='number of worker processes of the sharded engines (0 = one per core)')
+	parser.add_argument('--seed', type=int, default=0,
+		help='seed of the random point sets')
+	parser.add_argument('--no-memory', dest='memory', action='store_false',
+		help='do not measure peak memory (saves a run of every engine)')
+	args = parser.parse_args(argv)
+
+	if bpy is not None:
+		for addon in (selectclosestkd, selectclosest):
+			try:
+				addon.register()
+			except ValueError:
+				pass  # already enabled as an add-on
+	records = run(args)
+
+	with open(args.json, 'w') as f:
+		json.dump({
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'blender': bpy.app.version_string if bpy is not None else None,
+			'results': records}, f, indent=1)
+	disagree = [r for r in records if not r['agrees']]
+	for r in disagree:
+		print("{engine} disagrees on {shape} {points_a}/{points_b} overlap {overlap}: distance {distance}".format(**r))
+	if disagree:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+#  selectclosestkd/bvhcache.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# BVHTree.FromObject builds a tree over the faces of the evaluated
+# mesh (with modifiers and shape keys applied) in object space. Moving
+# an object does not change that tree, so we keep it until the depsgraph
+# reports that the geometry of the object or its mesh was updated.
+
+import bpy
+from bpy.app.handlers import persistent
+from mathutils.bvhtree import BVHTree
+from collections import OrderedDict
+
+# the number of trees kept around
+MAXTREES = 16
+
+# (object pointer, mesh pointer) -> tree, least recently used first
+cache = OrderedDict()
+
+
+def key(ob):
+	return ob.as_pointer(), ob.data.as_pointer()
+
+
+def tree(ob, depsgraph):
+	"""Return a BVH tree over the faces of an evaluated mesh object in object space."""
+	k = key(ob)
+	if k in cache:
+		cache.move_to_end(k)
+		return cache[k]
+	bvh = BVHTree.FromObject(ob, depsgraph)
+	cache[k] = bvh
+	while len(cache) > MAXTREES:
+		cache.popitem(last=False)
+	return bvh
+
+
+@persistent
+def depsgraph_update(scene, depsgraph):
+	updated = set()
+	for update in depsgraph.updates:
+		if update.is_updated_geometry:
+			updated.add(update.id.original.as_pointer())
+	for k in [k for k in cache if k[0] in updated or k[1] in updated]:
+		del cache[k]
+
+
+@persistent
+def clear(*args):
+	cache.clear()
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+	bpy.app.handlers.load_post.append(clear)
+
+
+def unregister():
+	bpy.app.handlers.load_post.remove(clear)
+	bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+	clear()
@@ -0,0 +1,145 @@
+#  selectclosestkd/kdcache.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Building and balancing a kd tree is O(n log n) and inserting the
+# points has to be done one at a time from Python, so we keep the
+# trees of recently used meshes around. The same goes for the other
+# spatial structures the planner uses.
+
+import bpy
+from bpy.app.handlers import persistent
+from mathutils import kdtree
+from collections import OrderedDict
+import numpy as np
+
+from .proximity.closestpair import PointTree
+
+# the total number of points in all cached trees is kept below this
+MAXPOINTS = 10000000
+# number of vertex positions that are part of the fingerprint of a mesh
+NSAMPLES = 8
+
+# key -> (tree, number of points), least recently used first
+cache = OrderedDict()
+# meshes changed by ourselves (by toggling edit mode),
+# the depsgraph update that follows should not evict them
+pending = set()
+
+
+def coordinates(me, matrix=None):
+	"""Return the vertex coordinates of a mesh as an (n, 3) array, optionally transformed."""
+	count = len(me.vertices)
+	co = np.empty(count*3, dtype=np.float32)
+	me.vertices.foreach_get('co', co)
+	co = co.reshape(count, 3).astype(np.float64)
+	if matrix is not None:
+		m = np.array(matrix)
+		co = co @ m[:3,:3].T + m[:3,3]
+	return co
+
+
+def fingerprint(me):
+	"""Return a cheap to calculate tuple that changes if the geometry changes."""
+	vertices = me.vertices
+	count = len(vertices)
+	samples = np.linspace(0, count - 1, min(count, NSAMPLES)).astype(int)
+	return (count, len(me.edges), len(me.polygons),
+		tuple(tuple(vertices[i].co) for i in samples))
+
+
+def key(ob, kind):
+	return (ob.data.as_pointer(),
+		tuple(tuple(row) for row in ob.matrix_world),
+		fingerprint(ob.data),
+		kind)
+
+
+def build(co):
+	"""Return a balanced kd tree of an (n, 3) array of coordinates."""
+	kd = kdtree.KDTree(len(co))
+	for i, c in enumerate(co):
+		kd.insert(c, i)
+	kd.balance()
+	return kd
+
+
+# the kinds of trees we can cache and the functions to build them
+builders = {
+	'KD': build,
+	'POINTTREE': PointTree,
+}
+
+
+def tree(ob, kind='KD'):
+	"""Return a tree of the vertices of a mesh object in world coordinates.
+
+	kind 'KD' is a mathutils kd tree and 'POINTTREE' a proximity.closestpair.PointTree
+	"""
+	k = key(ob, kind)
+	if k in cache:
+		cache.move_to_end(k)
+		return cache[k][0]
+	kd = builders[kind](coordinates(ob.data, ob.matrix_world))
+	cache[k] = (kd, len(ob.data.vertices))
+	total = sum(size for kd, size in cache.values())
+	while total > MAXPOINTS and len(cache) > 1:
+		oldkey, (oldkd, size) = cache.popitem(last=False)
+		total -= size
+	return kd
+
+
+def expect_update(me):
+	"""Mark a mesh as changed by us so the next depsgraph update keeps its trees."""
+	pending.add(me.as_pointer())
+
+
+@persistent
+def depsgraph_update(scene, depsgraph):
+	updated = set()
+	for update in depsgraph.updates:
+		if not update.is_updated_geometry:
+			continue
+		datablock = update.id.original
+		if isinstance(datablock, bpy.types.Object) and datablock.type == 'MESH':
+			updated.add(datablock.data.as_pointer())
+		elif isinstance(datablock, bpy.types.Mesh):
+			updated.add(datablock.as_pointer())
+	for ptr in updated:
+		if ptr in pending:
+			pending.discard(ptr)
+		else:
+			for k in [k for k in cache if k[0] == ptr]:
+				del cache[k]
+
+
+@persistent
+def clear(*args):
+	cache.clear()
+	pending.clear()
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+	bpy.app.handlers.load_post.append(clear)
+
+
+def unregister():
+	bpy.app.handlers.load_post.remove(clear)
+	bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+	clear()
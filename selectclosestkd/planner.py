@@ -0,0 +1,283 @@
+#  selectclosestkd/planner.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Finding the closest pair between two point sets is symmetric: we
+# can build a kd tree over either set and query it with the other.
+# Either way every point costs one Python call (an insert or a find),
+# but a tree over the smaller set is cheaper to build and balance,
+# and quicker to query because it is shallower.
+# When both sides are large even that is slow, and we can walk
+# hierarchies over both sides together instead (a dual tree search).
+# That pays off for objects that are some distance apart, but not for
+# surfaces that nearly touch everywhere, and building the hierarchies
+# is not free, so it is never chosen automatically. The search can
+# also be spread over several worker processes.
+
+import numpy as np
+
+from . import kdcache, bvhcache
+from .proximity.aabb import world_aabb, points_aabb, by_distance
+from .proximity.closestpair import closest_pair
+from .proximity.spatialhash import SpatialHash
+from .proximity import sharded
+
+# the blender enum items for choosing the side to build the tree over
+sides = [
+	('AUTO', 'Automatic', 'Build the kd tree over the side with the fewest vertices'),
+	('ACTIVE', 'Active', 'Build the kd tree over the active mesh'),
+	('OTHERS', 'Others', 'Build kd trees over the other meshes'),
+	('DUAL', 'Both', 'Search trees over both sides together, faster for large objects that are apart (closest vertex only)')
+]
+
+
+def plan(nactive, nothers, side='AUTO', dual=False):
+	"""Return 'ACTIVE', 'OTHERS' or 'DUAL', the side to build the tree(s) over.
+
+	'DUAL' is only returned if asked for and dual is True.
+	"""
+	if side == 'DUAL' and not dual:
+		side = 'AUTO'
+	if side != 'AUTO':
+		return side
+	return 'ACTIVE' if nactive <= nothers else 'OTHERS'
+
+
+def object_aabb(ob):
+	"""Return the world space box around the vertices of a mesh object."""
+	# bound_box is that of the evaluated mesh, which only
+	# contains all original vertices if nothing moved them
+	if len(ob.modifiers) == 0 and ob.data.shape_keys is None:
+		return world_aabb(ob.bound_box, ob.matrix_world)
+	return points_aabb(kdcache.coordinates(ob.data, ob.matrix_world))
+
+
+def evaluated_aabb(ob, depsgraph):
+	"""Return the world space box around the evaluated mesh of an object (its faces after modifiers)."""
+	return world_aabb(ob.evaluated_get(depsgraph).bound_box, ob.matrix_world)
+
+
+def closest_vertex_sharded(active, others, processes=0):
+	"""Return the index of the vertex of active closest to any vertex of others and the distance.
+
+	The larger side is split over processes worker processes (0 = one per core).
+	"""
+	activeco = kdcache.coordinates(active.data, active.matrix_world)
+	otherco = np.concatenate([kdcache.coordinates(ob.data, ob.matrix_world) for ob in others])
+	if len(activeco) >= len(otherco):
+		closest, other, distance = sharded.closest(otherco, activeco, processes)
+	else:
+		other, closest, distance = sharded.closest(activeco, otherco, processes)
+	return closest, distance
+
+
+def closest_vertex(active, others, side='AUTO', processes=None):
+	"""Return the index of the vertex of active closest to any vertex of others and the distance.
+
+	All objects must be mesh objects with at least one vertex. The
+	other objects are visited nearest bounding box first, and those
+	with a box farther away than the best distance so far are skipped.
+	If processes is not None the search runs in worker processes instead.
+	"""
+	if processes is not None:
+		return closest_vertex_sharded(active, others, processes)
+	nactive = len(active.data.vertices)
+	nothers = sum(len(ob.data.vertices) for ob in others)
+	order = by_distance(object_aabb(active), [object_aabb(ob) for ob in others])
+	closest = -1
+	closest_distance = 1e30  # big
+	strategy = plan(nactive, nothers, side, dual=True)
+	if strategy == 'DUAL':
+		activetree = kdcache.tree(active, 'POINTTREE')
+		for boxdistance, i in order:
+			if boxdistance > closest_distance:
+				break
+			index, other, dist = closest_pair(activetree, kdcache.tree(others[i], 'POINTTREE'))
+			if dist < closest_distance:
+				closest_distance = dist
+				closest = index
+	elif strategy == 'ACTIVE':
+		# the tree returns indices into the active mesh
+		kd = kdcache.tree(active)
+		for boxdistance, i in order:
+			if boxdistance > closest_distance:
+				break
+			ob = others[i]
+			for co in kdcache.coordinates(ob.data, ob.matrix_world).tolist():
+				co, index, dist = kd.find(co)
+				if dist < closest_distance:
+					closest_distance = dist
+					closest = index
+	else:
+		# the trees return indices into the other meshes, the
+		# index we need is the position of the query point
+		activeco = kdcache.coordinates(active.data, active.matrix_world).tolist()
+		for boxdistance, i in order:
+			if boxdistance > closest_distance:
+				break
+			kd = kdcache.tree(others[i])
+			for j, co in enumerate(activeco):
+				co, index, dist = kd.find(co)
+				if dist < closest_distance:
+					closest_distance = dist
+					closest = j
+	return closest, closest_distance
+
+
+def within_distance(active, others, distance, side='AUTO'):
+	"""Return a boolean array that is True for the vertices of active within distance of others."""
+	nactive = len(active.data.vertices)
+	nothers = sum(len(ob.data.vertices) for ob in others)
+	activebox = object_aabb(active)
+	# objects with a box farther away cannot contain anything within distance
+	order = by_distance(activebox, [object_aabb(ob) for ob in others])
+	candidates = [others[i] for boxdistance, i in order if boxdistance <= distance]
+	mask = np.zeros(nactive, dtype=bool)
+	if plan(nactive, nothers, side) == 'ACTIVE':
+		kd = kdcache.tree(active)
+		for ob in candidates:
+			for co in kdcache.coordinates(ob.data, ob.matrix_world).tolist():
+				for co, index, dist in kd.find_range(co, distance):
+					mask[index] = True
+	else:
+		activeco = kdcache.coordinates(active.data, active.matrix_world)
+		for ob in candidates:
+			# only active vertices inside the grown box of the other object can be near it
+			lo, hi = object_aabb(ob)
+			near = np.all((activeco >= lo - distance) & (activeco <= hi + distance), axis=1)
+			kd = kdcache.tree(ob)
+			for j in np.flatnonzero(near & ~mask).tolist():
+				co, index, dist = kd.find(activeco[j].tolist())
+				if dist <= distance:
+					mask[j] = True
+	return mask
+
+
+def nearest_k(active, others, k, side='AUTO'):
+	"""Return the indices of the k vertices of active closest to any vertex of others."""
+	nactive = len(active.data.vertices)
+	nothers = sum(len(ob.data.vertices) for ob in others)
+	# the distance of every active vertex to the others
+	best = np.full(nactive, np.inf)
+	if plan(nactive, nothers, side) == 'ACTIVE':
+		# if an active vertex is one of the k closest, it is also one of
+		# the k nearest neighbors of the other vertex closest to it
+		kd = kdcache.tree(active)
+		for ob in others:
+			for co in kdcache.coordinates(ob.data, ob.matrix_world).tolist():
+				for co, index, dist in kd.find_n(co, k):
+					if dist < best[index]:
+						best[index] = dist
+	else:
+		activeco = kdcache.coordinates(active.data, active.matrix_world).tolist()
+		for ob in others:
+			kd = kdcache.tree(ob)
+			for j, co in enumerate(activeco):
+				co, index, dist = kd.find(co)
+				if dist < best[j]:
+					best[j] = dist
+	k = min(k, np.count_nonzero(np.isfinite(best)))
+	return np.argsort(best, kind='stable')[:k]
+
+
+def grown_box_mask(co, box, distance):
+	"""Return a boolean array that is True for the points inside a (lo, hi) box grown by distance."""
+	if not np.isfinite(distance):
+		return np.ones(len(co), dtype=bool)
+	lo, hi = box
+	return np.all((co >= lo - distance) & (co <= hi + distance), axis=1)
+
+
+def vertex_distances(active, others, distance=np.inf):
+	"""Return the distance of every vertex of active to the nearest vertex of others.
+
+	Vertices farther than distance from all other objects get inf.
+	If distance is no more than a cell of a spatial hash over the other
+	object, all vertices are looked up in that hash at once and nothing
+	beyond distance is searched. Otherwise every vertex costs a find in
+	the cached kd tree.
+	"""
+	activeco = kdcache.coordinates(active.data, active.matrix_world)
+	best = np.full(len(activeco), np.inf)
+	order = by_distance(object_aabb(active), [object_aabb(ob) for ob in others])
+	for boxdistance, i in order:
+		if boxdistance > distance:
+			break
+		ob = others[i]
+		near = np.flatnonzero(grown_box_mask(activeco, object_aabb(ob), distance))
+		if len(near) == 0:
+			continue
+		grid = None
+		if np.isfinite(distance):
+			grid = SpatialHash(kdcache.coordinates(ob.data, ob.matrix_world))
+		if grid is not None and distance <= grid.cellsize:
+			index, d = grid.nearest(activeco[near], distance)
+			best[near] = np.minimum(best[near], d)
+			continue
+		kd = kdcache.tree(ob)
+		for j, co in zip(near.tolist(), activeco[near].tolist()):
+			co, index, d = kd.find(co)
+			if d < best[j]:
+				best[j] = d
+	best[best > distance] = np.inf
+	return best
+
+
+def surface_distances(active, others, depsgraph, distance=np.inf, shrink=False):
+	"""Return the distance of every vertex of active to the nearest face of others.
+
+	Vertices farther than distance from all other objects get inf. With
+	shrink=True the distance shrinks to the closest distance found so far,
+	which is enough if we only need the closest vertex.
+	"""
+	activeco = kdcache.coordinates(active.data, active.matrix_world)
+	best = np.full(len(activeco), np.inf)
+	# modifiers may move the faces outside the box of the original vertices
+	boxes = [evaluated_aabb(ob, depsgraph) for ob in others]
+	order = by_distance(object_aabb(active), boxes)
+	for boxdistance, i in order:
+		if boxdistance > distance:
+			break
+		ob = others[i]
+		bvh = bvhcache.tree(ob, depsgraph)
+		# the tree is in object space, so we query with local coordinates
+		# and convert the nearest points back to world space. A distance d
+		# in local space is at most d * longest in world space and a world
+		# space distance at most 1 / shortest times as long in local space
+		matrix = np.array(ob.matrix_world)
+		inverse = np.linalg.inv(matrix)
+		axes = np.linalg.svd(matrix[:3,:3], compute_uv=False)
+		longest, shortest = axes.max(), axes.min()
+		local = activeco @ inverse[:3,:3].T + inverse[:3,3]
+		candidates = np.flatnonzero(grown_box_mask(activeco, boxes[i], distance))
+		found = []
+		nearest = []
+		for j, co in zip(candidates.tolist(), local[candidates].tolist()):
+			limit = min(distance, best[j]) / shortest
+			co, normal, index, d = bvh.find_nearest(co, min(limit, 1e30))
+			if co is not None:
+				found.append(j)
+				nearest.append(co)
+				if shrink:
+					distance = min(distance, d * longest)
+		if found:
+			nearest = np.array(nearest) @ matrix[:3,:3].T + matrix[:3,3]
+			d = np.linalg.norm(nearest - activeco[found], axis=1)
+			best[found] = np.minimum(best[found], d)
+	best[best > distance] = np.inf
+	return best
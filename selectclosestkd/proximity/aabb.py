@@ -0,0 +1,48 @@
+#  selectclosestkd/proximity/aabb.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Axis aligned bounding boxes are stored as a (min, max) pair of
+# 3 element arrays. No point in a box can be closer to a point in
+# another box than the distance between the boxes, so objects can
+# be skipped once that distance exceeds the best distance so far.
+
+import numpy as np
+
+
+def world_aabb(corners, matrix):
+	"""Return the world space box around the (local) corners of a bound_box."""
+	m = np.asarray(matrix, dtype=np.float64)
+	co = np.asarray(corners, dtype=np.float64) @ m[:3,:3].T + m[:3,3]
+	return co.min(axis=0), co.max(axis=0)
+
+
+def points_aabb(co):
+	"""Return the box around an (n, 3) array of points."""
+	return co.min(axis=0), co.max(axis=0)
+
+
+def box_distance(a, b):
+	"""Return the smallest distance between any point in box a and any point in box b."""
+	gap = np.maximum(0, np.maximum(a[0] - b[1], b[0] - a[1]))
+	return float(np.sqrt(gap @ gap))
+
+
+def by_distance(box, boxes):
+	"""Return a list of (distance, index) for boxes, sorted by their distance to box."""
+	return sorted((box_distance(box, b), i) for i, b in enumerate(boxes))
@@ -0,0 +1,68 @@
+#  selectclosestkd/proximity/bruteforce.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Comparing every point with every other point is O(n * m), but with
+# numpy it is fast enough for smaller point sets, and it is the
+# reference the other engines are checked against. The matrix of
+# pairwise distances is evaluated in blocks so memory stays bounded.
+
+import numpy as np
+
+BLOCKSIZE = 256
+
+
+def squared_distances(a, b):
+	"""Return the (len(a), len(b)) matrix of squared distances between the rows of a and b."""
+	diff = a[:, np.newaxis, :] - b[np.newaxis, :, :]
+	return np.einsum('ijk,ijk->ij', diff, diff)
+
+
+def nearest(points, queries, blocksize=BLOCKSIZE):
+	"""Return for every query the index of the nearest point and the distance to it."""
+	points = np.asarray(points, dtype=np.float64)
+	queries = np.asarray(queries, dtype=np.float64)
+	index = np.full(len(queries), -1, dtype=np.int64)
+	best = np.full(len(queries), np.inf)
+	for qlo in range(0, len(queries), blocksize):
+		qblock = queries[qlo:qlo+blocksize]
+		qbest = best[qlo:qlo+blocksize]
+		qindex = index[qlo:qlo+blocksize]
+		for plo in range(0, len(points), blocksize):
+			d2 = squared_distances(qblock, points[plo:plo+blocksize])
+			j = np.argmin(d2, axis=1)
+			d2 = d2[np.arange(len(j)), j]
+			better = d2 < qbest
+			qbest[better] = d2[better]
+			qindex[better] = plo + j[better]
+	return index, np.sqrt(best)
+
+
+def closest_pair(a, b, blocksize=BLOCKSIZE):
+	"""Return the indices of the closest pair of rows of a and b and their distance."""
+	a = np.asarray(a, dtype=np.float64)
+	b = np.asarray(b, dtype=np.float64)
+	best = (-1, -1, np.inf)
+	for alo in range(0, len(a), blocksize):
+		ablock = a[alo:alo+blocksize]
+		for blo in range(0, len(b), blocksize):
+			d2 = squared_distances(ablock, b[blo:blo+blocksize])
+			i, j = np.unravel_index(np.argmin(d2), d2.shape)
+			if d2[i, j] < best[2]:
+				best = (alo + i, blo + j, d2[i, j])
+	return best[0], best[1], float(np.sqrt(best[2]))
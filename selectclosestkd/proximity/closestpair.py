@@ -0,0 +1,121 @@
+#  selectclosestkd/proximity/closestpair.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# The closest pair of points between two large point sets can be found
+# without looking at most points at all. We build a hierarchy of
+# bounding boxes over each set and walk both hierarchies together,
+# nearest pair of boxes first. A pair of boxes farther apart than the
+# closest pair found so far cannot contain a closer pair, and because
+# the boxes are visited in order of distance we can stop at the first
+# such pair. Pairs of leaves are compared point by point with numpy.
+
+from heapq import heappush, heappop
+import numpy as np
+
+from .aabb import box_distance
+from .bruteforce import closest_pair as brute_closest_pair
+
+# maximum number of points in a leaf of the hierarchy
+LEAFSIZE = 128
+
+
+class PointTree:
+	"""A hierarchy of bounding boxes over an (n, 3) array of points."""
+
+	def __init__(self, points, leafsize=LEAFSIZE):
+		# the points are reordered so that the points of node i are
+		# self.points[self.start[i]:self.end[i]], self.index maps
+		# them back to their original position
+		self.points = np.array(points, dtype=np.float64).reshape(-1, 3)
+		self.index = np.arange(len(self.points))
+		lo, hi, start, end, left, right = [], [], [], [], [], []
+
+		def add(s, e):
+			box = self.points[s:e]
+			lo.append(box.min(axis=0))
+			hi.append(box.max(axis=0))
+			start.append(s)
+			end.append(e)
+			left.append(-1)
+			right.append(-1)
+			return len(start) - 1
+
+		if len(self.points):
+			stack = [add(0, len(self.points))]
+			while stack:
+				node = stack.pop()
+				s, e = start[node], end[node]
+				if e - s <= leafsize:
+					continue
+				# split at the median of the longest side of the box
+				axis = np.argmax(hi[node] - lo[node])
+				mid = (s + e) // 2
+				order = np.argpartition(self.points[s:e, axis], mid - s)
+				self.points[s:e] = self.points[s:e][order]
+				self.index[s:e] = self.index[s:e][order]
+				left[node] = add(s, mid)
+				right[node] = add(mid, e)
+				stack.extend((left[node], right[node]))
+		self.lo = np.array(lo).reshape(-1, 3)
+		self.hi = np.array(hi).reshape(-1, 3)
+		self.start = np.array(start, dtype=np.int64)
+		self.end = np.array(end, dtype=np.int64)
+		self.left = np.array(left, dtype=np.int64)
+		self.right = np.array(right, dtype=np.int64)
+
+	def __len__(self):
+		return len(self.points)
+
+	def box(self, node):
+		return self.lo[node], self.hi[node]
+
+	def size(self, node):
+		return self.end[node] - self.start[node]
+
+	def is_leaf(self, node):
+		return self.left[node] < 0
+
+
+def closest_pair(a, b):
+	"""Return the indices of the closest pair of points of two PointTrees and their distance."""
+	best = (-1, -1, np.inf)
+	if len(a) == 0 or len(b) == 0:
+		return best
+	heap = [(box_distance(a.box(0), b.box(0)), 0, 0)]
+	while heap:
+		distance, i, j = heappop(heap)
+		if distance >= best[2]:
+			break
+		if a.is_leaf(i) and b.is_leaf(j):
+			ia, ib, d = brute_closest_pair(
+				a.points[a.start[i]:a.end[i]], b.points[b.start[j]:b.end[j]])
+			if d < best[2]:
+				best = (a.index[a.start[i] + ia], b.index[b.start[j] + ib], d)
+		elif b.is_leaf(j) or (not a.is_leaf(i) and a.size(i) >= b.size(j)):
+			# split the largest node
+			for child in (a.left[i], a.right[i]):
+				d = box_distance(a.box(child), b.box(j))
+				if d < best[2]:
+					heappush(heap, (d, child, j))
+		else:
+			for child in (b.left[j], b.right[j]):
+				d = box_distance(a.box(i), b.box(child))
+				if d < best[2]:
+					heappush(heap, (d, i, child))
+	return int(best[0]), int(best[1]), best[2]
@@ -0,0 +1,118 @@
+#  selectclosestkd/proximity/sharded.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Find the closest pair between a set of points and a (large) set of
+# query points using several processes. Both arrays are put in shared
+# memory so they are not copied to every worker, the queries are split
+# into one shard per worker, and every worker returns only the closest
+# pair of its shard.
+#
+# Worker processes run a plain python interpreter, without bpy, so they
+# cannot import this module as part of the add-on package (whose
+# __init__ imports bpy). That is why the workers are given the functions
+# of this module as imported from the top level proximity package. The
+# directory that contains it is added to the path of the workers when
+# they start, and only temporarily to our own path.
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import importlib
+import os
+import site
+import sys
+import numpy as np
+
+from .closestpair import PointTree, closest_pair as tree_closest_pair
+from .bruteforce import closest_pair as brute_closest_pair
+
+# the directory that contains the top level proximity package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the searches a worker can use, all return (query index, point index, distance)
+engines = {
+	'TREE': lambda queries, points: tree_closest_pair(PointTree(queries), PointTree(points)),
+	'BRUTE': brute_closest_pair,
+}
+
+
+def attach(spec):
+	"""Return the shared memory block and the array described by spec (name, shape)."""
+	from multiprocessing import shared_memory
+	name, shape = spec
+	shm = shared_memory.SharedMemory(name=name)
+	return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def search_shard(points_spec, queries_spec, lo, hi, engine='TREE'):
+	"""Return (query index, point index, distance) of the closest pair for queries[lo:hi]."""
+	pshm, points = attach(points_spec)
+	qshm, queries = attach(queries_spec)
+	try:
+		i, j, distance = engines[engine](queries[lo:hi], points)
+		return lo + int(i), int(j), float(distance)
+	finally:
+		# the arrays are views on the shared memory and must go first
+		del points, queries
+		pshm.close()
+		qshm.close()
+
+
+def worker_module():
+	"""Return this module as imported from the top level proximity package."""
+	sys.path.insert(0, ROOT)
+	try:
+		return importlib.import_module('proximity.sharded')
+	finally:
+		sys.path.remove(ROOT)
+
+
+def closest(points, queries, processes=0, engine='TREE'):
+	"""Return (query index, point index, distance) of the closest pair of queries and points.
+
+	The queries are split over processes worker processes (0 = one per core).
+	Every worker searches all points, so points should be the smaller set.
+	"""
+	from multiprocessing import shared_memory
+	points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+	queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+	if len(points) == 0 or len(queries) == 0:
+		return -1, -1, np.inf
+	processes = min(processes or os.cpu_count() or 1, len(queries))
+	blocks = []
+	specs = []
+	try:
+		for array in (points, queries):
+			shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+			blocks.append(shm)
+			np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf)[:] = array
+			specs.append((shm.name, array.shape))
+		shards = np.linspace(0, len(queries), processes + 1).astype(int)
+		search = worker_module().search_shard
+		# never fork blender itself, start fresh interpreters instead
+		context = multiprocessing.get_context('spawn')
+		with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+				initializer=site.addsitedir, initargs=(ROOT,)) as pool:
+			futures = [pool.submit(search, specs[0], specs[1], int(lo), int(hi), engine)
+						for lo, hi in zip(shards[:-1], shards[1:]) if hi > lo]
+			results = [future.result() for future in futures]
+	finally:
+		for shm in blocks:
+			shm.close()
+			shm.unlink()
+	return min(results, key=lambda result: result[2])
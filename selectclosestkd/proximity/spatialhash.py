@@ -0,0 +1,158 @@
+#  selectclosestkd/proximity/spatialhash.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# A uniform grid of cubic cells over a set of points. The points are
+# sorted by the key of the cell they are in, so the points in a cell
+# are a contiguous range that is found with a binary search on the
+# sorted keys. Queries are answered for whole arrays of query points
+# at once, by checking the points in all cells within the search
+# radius. That is only fast for short distances: for unbounded nearest
+# neighbor searches a kd tree is the better choice.
+
+from math import ceil
+import numpy as np
+
+from .bruteforce import squared_distances
+
+# number of queries handled together, to limit memory use
+BATCHSIZE = 4096
+# average number of points per occupied cell we aim for
+OCCUPANCY = 4
+
+
+def cube_offsets(r):
+	"""Return the (k, 3) cell offsets at Chebyshev distance r or less."""
+	return np.mgrid[-r:r+1, -r:r+1, -r:r+1].reshape(3, -1).T
+
+
+class SpatialHash:
+	"""A uniform grid over an (n, 3) array of points."""
+
+	def __init__(self, points, cellsize=None):
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+		self.origin = points.min(axis=0) if len(points) else np.zeros(3)
+		if cellsize is None:
+			cellsize = self.estimate_cellsize(points)
+		self.cellsize = float(cellsize)
+		cells = self.cells(points)
+		self.dims = cells.max(axis=0) + 1 if len(points) else np.ones(3, dtype=np.int64)
+		keys = self.keys(cells)
+		self.index = np.argsort(keys, kind='stable')
+		self.points = points[self.index]
+		# the occupied cells and the range of points in each of them
+		self.cellkeys, self.start, counts = np.unique(
+			keys[self.index], return_index=True, return_counts=True)
+		self.end = self.start + counts
+
+	def estimate_cellsize(self, points):
+		"""Return a cell size that puts about OCCUPANCY points in an occupied cell."""
+		n = len(points)
+		if n < 2:
+			return 1.0
+		extent = points.max(axis=0) - self.origin
+		size = extent.max()
+		if size == 0:
+			return 1.0
+		# first guess assumes the points fill the box (ignoring flat axes)
+		extent = extent[extent > size * 1e-6]
+		cellsize = (np.prod(extent) * OCCUPANCY / n) ** (1 / len(extent))
+		# points on a surface occupy far fewer cells, so refine once
+		self.cellsize = cellsize
+		cells = self.cells(points)
+		occupied = len(np.unique(self.keys(cells, dims=cells.max(axis=0) + 1)))
+		occupancy = n / occupied
+		if occupancy > 2 * OCCUPANCY:
+			cellsize *= (OCCUPANCY / occupancy) ** 0.5
+		return max(cellsize, size * 1e-6)
+
+	def cells(self, points):
+		"""Return the integer cell coordinates of an (n, 3) array of points."""
+		return np.floor((points - self.origin) / self.cellsize).astype(np.int64)
+
+	def keys(self, cells, dims=None):
+		"""Return the keys of (..., 3) cell coordinates inside a grid (by default this one)."""
+		if dims is None:
+			dims = self.dims
+		return (cells[..., 0] * dims[1] + cells[..., 1]) * dims[2] + cells[..., 2]
+
+	def lookup(self, cells):
+		"""Return the start and end of the point ranges of (..., 3) cell coordinates."""
+		valid = np.all((cells >= 0) & (cells < self.dims), axis=-1)
+		keys = self.keys(cells)
+		pos = np.minimum(np.searchsorted(self.cellkeys, keys), len(self.cellkeys) - 1)
+		found = valid & (self.cellkeys[pos] == keys)
+		return np.where(found, self.start[pos], 0), np.where(found, self.end[pos], 0)
+
+	@staticmethod
+	def candidates(queries, start, end):
+		"""Expand per query point ranges to arrays of (query, point) pairs."""
+		counts = end - start
+		total = counts.sum()
+		q = np.repeat(queries, counts)
+		p = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(total)
+		return q, p
+
+	def nearest(self, queries, max_distance):
+		"""Return for every query the index of the nearest point within max_distance and the distance to it.
+
+		Queries without a point within max_distance get index -1 and distance inf.
+		"""
+		queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+		index = np.full(len(queries), -1, dtype=np.int64)
+		distance = np.full(len(queries), np.inf)
+		for lo in range(0, len(queries), BATCHSIZE):
+			q, p, d = self.within(queries[lo:lo+BATCHSIZE], max_distance)
+			# the closest point of every query is the first one once sorted by distance
+			order = np.lexsort((d, q))
+			q, p, d = q[order] + lo, p[order], d[order]
+			first = np.ones(len(q), dtype=bool)
+			first[1:] = q[1:] != q[:-1]
+			index[q[first]] = p[first]
+			distance[q[first]] = d[first]
+		return index, distance
+
+	def within(self, queries, radius):
+		"""Return (query index, point index, distance) arrays of all pairs within radius."""
+		queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+		r = int(ceil(radius / self.cellsize))
+		qs, ps = [], []
+		if len(self.points) and len(queries):
+			if (2 * r + 1)**3 > max(64, len(self.cellkeys)):
+				# every point is a candidate anyway
+				for lo in range(0, len(queries), BATCHSIZE // 16):
+					d2 = squared_distances(queries[lo:lo+BATCHSIZE // 16], self.points)
+					q, p = np.nonzero(d2 <= radius**2)
+					qs.append(q + lo)
+					ps.append(p)
+			else:
+				offsets = cube_offsets(r)
+				batch = max(1, BATCHSIZE * 27 // len(offsets))
+				cells = self.cells(queries)
+				for lo in range(0, len(queries), batch):
+					sel = np.arange(lo, min(lo + batch, len(queries)))
+					start, end = self.lookup(cells[sel][:, np.newaxis, :] + offsets)
+					q, p = self.candidates(np.repeat(sel, len(offsets)), start.ravel(), end.ravel())
+					diff = self.points[p] - queries[q]
+					inside = np.einsum('ij,ij->i', diff, diff) <= radius**2
+					qs.append(q[inside])
+					ps.append(p[inside])
+		q = np.concatenate(qs) if qs else np.empty(0, dtype=np.int64)
+		p = np.concatenate(ps) if ps else np.empty(0, dtype=np.int64)
+		distance = np.linalg.norm(self.points[p] - queries[q], axis=1)
+		return q, self.index[p], distance
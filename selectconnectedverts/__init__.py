@@ -0,0 +1,339 @@
+#  selectconnectedverts
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+
+import bpy
+import bmesh
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+import numpy as np
+
+from . import adjacency, islands
+from .selectflush import flush
+
+bl_info = {
+	"name": "Select Connected Verts",
+	"author": "Michel Anders (varkenvarken)",
+	"version": (0, 0, 202610182150),
+	"blender": (2, 92, 0),
+	"location": "View3D > Select > Connected Verts",
+	"description": "A dummy operator",
+	"warning": "",
+	"wiki_url": "",
+	"tracker_url": "",
+	# Note: you can define your own category if you like
+	"category": "Experimental development"}
+
+
+def selection(mesh):
+	"""Return the select state of all vertices as a boolean array."""
+	select = np.empty(len(mesh.vertices), dtype=bool)
+	mesh.vertices.foreach_get('select', select)
+	return select
+
+
+def change_selection(context, change):
+	"""Replace the vertex selection of the active mesh with change(adjacency, select)."""
+	# selecting a mesh elements in edit mode wont work
+	bpy.ops.object.mode_set(mode='OBJECT')
+	mesh = context.active_object.data
+	# the edges and faces follow the new vertex selection
+	flush(mesh, change(adjacency.index(mesh), selection(mesh)))
+	bpy.ops.object.mode_set(mode='EDIT')
+	# switching modes does not change the topology
+	adjacency.expect_update(mesh)
+
+
+def point_attribute(mesh, name, data_type):
+	"""Return the point attribute with this name, (re)created if it is missing or of another type."""
+	attribute = mesh.attributes.get(name)
+	if attribute is not None and (attribute.data_type != data_type or attribute.domain != 'POINT'):
+		mesh.attributes.remove(attribute)
+		attribute = None
+	if attribute is None:
+		attribute = mesh.attributes.new(name, data_type, 'POINT')
+	return attribute
+
+
+class ConnectedOp(bpy.types.Operator):
+	bl_idname = 'mesh.connectedop'
+	bl_label = 'Connected Verts'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	engine : EnumProperty(
+		name='Engine',
+		description='How to find the connected vertices',
+		items=[
+			('NUMPY', 'Numpy', 'Look up the neighbors of the selected vertices in a cached index'),
+			('PYTHON', 'Python', 'Check the edges one by one (slow)')
+		])
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		if self.engine == 'NUMPY':
+			change_selection(context, lambda index, select: index.grow(select))
+			return {"FINISHED"}
+		# selecting a mesh elements in edit mode wont work
+		bpy.ops.object.mode_set(mode='OBJECT')
+		mesh = context.active_object.data
+		# collect a set of all indices of selected verts
+		v_indices = {v.index for v in mesh.vertices if v.select}
+		# select all verts that share an edge w. a selected vert
+		for e in mesh.edges:
+			v1,v2 = tuple(e.vertices)
+			if v1 in v_indices:
+				mesh.vertices[v2].select = True
+			if v2 in v_indices:
+				mesh.vertices[v1].select = True
+		# switch back. Note: mode is NOT called EDIT_MESH
+		bpy.ops.object.mode_set(mode='EDIT')
+		return {"FINISHED"}
+
+class ConnectedOpBMesh(bpy.types.Operator):
+	bl_idname = 'mesh.connectedopbmesh'
+	bl_label = 'Connected Verts BMesh'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		# no need to free or create a new bmesh object
+		# because our add-on doesn't own the data
+		bm = bmesh.from_edit_mesh(context.active_object.data)
+		selected = [v for v in bm.verts if v.select]
+		for v in selected:
+			for e in v.link_edges:
+				e.other_vert(v).select = True
+		bm.select_flush(True)
+		bmesh.update_edit_mesh(context.active_object.data)
+		return {"FINISHED"}
+
+
+class GrowRingsOp(bpy.types.Operator):
+	bl_idname = 'mesh.growringsop'
+	bl_label = 'Grow by Rings'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	rings : IntProperty(name='Rings', default=1, min=1)
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		change_selection(context, lambda index, select: index.grow(select, self.rings))
+		return {"FINISHED"}
+
+
+class ShrinkRingsOp(bpy.types.Operator):
+	bl_idname = 'mesh.shrinkringsop'
+	bl_label = 'Shrink by Rings'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	rings : IntProperty(name='Rings', default=1, min=1)
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		change_selection(context, lambda index, select: index.shrink(select, self.rings))
+		return {"FINISHED"}
+
+
+class RingDistanceOp(bpy.types.Operator):
+	bl_idname = 'mesh.ringdistanceop'
+	bl_label = 'Select by Ring Distance'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	minimum : IntProperty(name='Minimum', default=1, min=0,
+		description='Select vertices at least this many edges away from the selection')
+	maximum : IntProperty(name='Maximum', default=1, min=0,
+		description='Select vertices at most this many edges away from the selection')
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		def ring(index, select):
+			distance = index.distances(np.flatnonzero(select), self.maximum)
+			return (distance >= self.minimum) & (distance <= self.maximum)
+		change_selection(context, ring)
+		return {"FINISHED"}
+
+
+class RingDistanceAttributeOp(bpy.types.Operator):
+	"""Store the number of edges from the selection to every vertex in an attribute"""
+	bl_idname = 'mesh.ringdistanceattributeop'
+	bl_label = 'Ring Distance Attribute'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	name : StringProperty(name='Name', default='Rings')
+	length : BoolProperty(name='Edge length', default=False,
+		description="Also store the length of the edges walked in a float attribute, named like this one with ' length' added")
+	rings : IntProperty(name='Rings', default=0, min=0,
+		description='Stop after this many rings, vertices farther away get -1 (0 = no limit)')
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		# attributes and the selection are only up to date in object mode
+		bpy.ops.object.mode_set(mode='OBJECT')
+		mesh = context.active_object.data
+		index = adjacency.index(mesh)
+		sources = np.flatnonzero(selection(mesh))
+		rings = self.rings if self.rings > 0 else np.inf
+		if self.length:
+			co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+			mesh.vertices.foreach_get('co', co)
+			distance, length = index.distances(sources, rings, co=co.reshape(-1, 3).astype(np.float64))
+		else:
+			distance = index.distances(sources, rings)
+		# adding an attribute may invalidate others, so each is filled right away
+		point_attribute(mesh, self.name, 'INT').data.foreach_set('value', distance)
+		if self.length:
+			length[distance < 0] = -1
+			point_attribute(mesh, self.name + ' length', 'FLOAT').data.foreach_set('value', length.astype(np.float32))
+		bpy.ops.object.mode_set(mode='EDIT')
+		# switching modes and adding attributes does not change the topology
+		adjacency.expect_update(mesh)
+		return {"FINISHED"}
+
+
+class SelectIslandsOp(bpy.types.Operator):
+	bl_idname = 'mesh.selectislandsop'
+	bl_label = 'Select Linked Islands'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'EDIT_MESH' and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		def linked(index, select):
+			labels = index.islands()
+			selected = np.zeros(labels.max() + 1 if len(labels) else 0, dtype=bool)
+			selected[labels[select]] = True
+			return selected[labels]
+		change_selection(context, linked)
+		return {"FINISHED"}
+
+
+class IslandAttributeOp(bpy.types.Operator):
+	"""Store the island number of every vertex in an integer attribute"""
+	bl_idname = 'object.islandattributeop'
+	bl_label = 'Island Attribute'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	name : StringProperty(name='Name', default='Island')
+
+	@classmethod
+	def poll(self, context):
+		return (context.mode == 'OBJECT' and
+				context.active_object is not None and
+				context.active_object.type == 'MESH')
+
+	def execute(self, context):
+		mesh = context.active_object.data
+		labels = adjacency.index(mesh).islands()
+		point_attribute(mesh, self.name, 'INT').data.foreach_set('value', labels.astype(np.int32))
+		mesh.update()
+		# a new attribute does not change the topology
+		adjacency.expect_update(mesh)
+
+		co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('co', co)
+		counts, lo, hi = islands.stats(labels, co.reshape(-1, 3))
+		self.report({'INFO'}, "%d islands" % len(counts))
+		# the largest islands with their bounds in object space
+		for i in np.argsort(-counts, kind='stable')[:20]:
+			print("island %6d %9d verts  %s - %s" % (i, counts[i],
+				np.array2string(lo[i], precision=3), np.array2string(hi[i], precision=3)))
+		return {"FINISHED"}
+
+
+def menu_func(self, context):
+	self.layout.operator(
+		ConnectedOp.bl_idname,
+		text=ConnectedOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		ConnectedOpBMesh.bl_idname,
+		text=ConnectedOpBMesh.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		RingDistanceAttributeOp.bl_idname,
+		text=RingDistanceAttributeOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		GrowRingsOp.bl_idname,
+		text=GrowRingsOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		ShrinkRingsOp.bl_idname,
+		text=ShrinkRingsOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		RingDistanceOp.bl_idname,
+		text=RingDistanceOp.bl_label,
+		icon='PLUGIN')
+	self.layout.operator(
+		SelectIslandsOp.bl_idname,
+		text=SelectIslandsOp.bl_label,
+		icon='PLUGIN')
+
+
+def menu_func_object(self, context):
+	self.layout.operator(
+		IslandAttributeOp.bl_idname,
+		text=IslandAttributeOp.bl_label,
+		icon='PLUGIN')
+
+
+classes = [ConnectedOp, ConnectedOpBMesh, GrowRingsOp, ShrinkRingsOp, RingDistanceOp,
+	RingDistanceAttributeOp, SelectIslandsOp, IslandAttributeOp]
+
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+def register():
+	register_classes()
+	adjacency.register()
+	bpy.types.VIEW3D_MT_select_edit_mesh.append(menu_func)
+	bpy.types.VIEW3D_MT_object.append(menu_func_object)
+
+
+def unregister():
+	bpy.types.VIEW3D_MT_object.remove(menu_func_object)
+	bpy.types.VIEW3D_MT_select_edit_mesh.remove(menu_func)
+	adjacency.unregister()
+	unregister_classes()
@@ -0,0 +1,200 @@
+#  selectconnectedverts/adjacency.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Growing a selection by checking every edge costs a pass over all
+# edges for every ring. With the neighbors of every vertex stored
+# together (compressed sparse row form: the neighbors of vertex i are
+# neighbors[offsets[i]:offsets[i+1]]) a ring only costs the edges of
+# the vertices on its frontier. The index only depends on the topology
+# of a mesh, so we keep it until the mesh is changed by someone else.
+
+import bpy
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+import numpy as np
+
+from . import islands
+
+# the total number of edges in all cached indices is kept below this
+MAXEDGES = 20000000
+
+# mesh pointer -> Adjacency, least recently used first
+cache = OrderedDict()
+# meshes changed by ourselves (by switching modes),
+# the depsgraph update that follows should not evict them
+pending = set()
+
+
+class Adjacency:
+	"""The neighbors of every vertex given an (n, 2) array of edges."""
+
+	def __init__(self, edges, count):
+		edges = np.asarray(edges).reshape(-1, 2)
+		self.count = count
+		self.nedges = len(edges)
+		# every edge goes both ways
+		start = np.concatenate([edges[:, 0], edges[:, 1]])
+		end = np.concatenate([edges[:, 1], edges[:, 0]])
+		self.neighbors = end[np.argsort(start, kind='stable')]
+		self.offsets = np.zeros(count + 1, dtype=np.int64)
+		np.cumsum(np.bincount(start, minlength=count), out=self.offsets[1:])
+		self.labels = None
+
+	def islands(self):
+		"""Return the island number of every vertex, calculated once."""
+		if self.labels is None:
+			start = np.repeat(np.arange(self.count), np.diff(self.offsets))
+			self.labels = islands.label(np.column_stack([start, self.neighbors]), self.count)
+		return self.labels
+
+	def neighbors_of(self, vertices, origins=False):
+		"""Return the neighbors of an array of vertex indices, duplicates included.
+
+		With origins=True the vertex each neighbor belongs to is returned as well.
+		"""
+		start = self.offsets[vertices]
+		counts = self.offsets[vertices + 1] - start
+		# the positions of the neighbors of all vertices, one range after the other
+		positions = np.arange(counts.sum()) + np.repeat(start - (np.cumsum(counts) - counts), counts)
+		if origins:
+			return self.neighbors[positions], np.repeat(vertices, counts)
+		return self.neighbors[positions]
+
+	def distances(self, sources, rings=np.inf, allowed=None, co=None):
+		"""Return the number of edges from the nearest source for every vertex.
+
+		The search stops after rings rings and only steps onto vertices
+		in the boolean mask allowed, if given. Vertices that are not
+		reached get -1. If the (n, 3) vertex coordinates co are given,
+		the length of the edges walked to every vertex is returned as
+		well (the shortest walk with the fewest edges, not necessarily
+		the shortest path), with inf for vertices not reached.
+		"""
+		distance = np.full(self.count, -1, dtype=np.int32)
+		frontier = np.unique(sources)
+		distance[frontier] = 0
+		if co is None:
+			last = np.empty(self.count, dtype=np.int64)
+		else:
+			length = np.full(self.count, np.inf)
+			length[frontier] = 0
+		ring = 0
+		while len(frontier) and ring < rings:
+			ring += 1
+			if co is None:
+				candidates = self.neighbors_of(frontier)
+			else:
+				candidates, origins = self.neighbors_of(frontier, origins=True)
+			new = distance[candidates] < 0
+			if allowed is not None:
+				new &= allowed[candidates]
+			if co is None:
+				candidates = candidates[new]
+				# keep every vertex once, the last write to last wins
+				positions = np.arange(len(candidates))
+				last[candidates] = positions
+				frontier = candidates[last[candidates] == positions]
+			else:
+				candidates, origins = candidates[new], origins[new]
+				walked = length[origins] + np.linalg.norm(co[candidates] - co[origins], axis=1)
+				# keep the shortest walk to every new vertex
+				order = np.lexsort((walked, candidates))
+				candidates, walked = candidates[order], walked[order]
+				first = np.ones(len(candidates), dtype=bool)
+				first[1:] = candidates[1:] != candidates[:-1]
+				frontier = candidates[first]
+				length[frontier] = walked[first]
+			distance[frontier] = ring
+		if co is None:
+			return distance
+		return distance, length
+
+	def grow(self, select, rings=1):
+		"""Return a vertex mask with all vertices within rings edges of select."""
+		return self.distances(np.flatnonzero(select), rings) >= 0
+
+	def shrink(self, select, rings=1):
+		"""Return a vertex mask without the vertices within rings edges of the unselected ones."""
+		# the unselected vertices next to the selection
+		outside = self.neighbors_of(np.flatnonzero(select))
+		outside = outside[~select[outside]]
+		return select & (self.distances(outside, rings, allowed=select) < 0)
+
+
+def edge_vertices(mesh):
+	"""Return the vertex indices of all edges as an (n, 2) array."""
+	edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+	mesh.edges.foreach_get('vertices', edges)
+	return edges.reshape(-1, 2)
+
+
+def index(mesh):
+	"""Return the Adjacency of a mesh, built when needed."""
+	k = mesh.as_pointer()
+	adjacency = cache.get(k)
+	if adjacency is not None and (adjacency.count, adjacency.nedges) == (len(mesh.vertices), len(mesh.edges)):
+		cache.move_to_end(k)
+		return adjacency
+	adjacency = Adjacency(edge_vertices(mesh), len(mesh.vertices))
+	cache[k] = adjacency
+	total = sum(a.nedges for a in cache.values())
+	while total > MAXEDGES and len(cache) > 1:
+		oldkey, old = cache.popitem(last=False)
+		total -= old.nedges
+	return adjacency
+
+
+def expect_update(mesh):
+	"""Mark a mesh as changed by us so the next depsgraph update keeps its index."""
+	pending.add(mesh.as_pointer())
+
+
+@persistent
+def depsgraph_update(scene, depsgraph):
+	updated = set()
+	for update in depsgraph.updates:
+		if not update.is_updated_geometry:
+			continue
+		datablock = update.id.original
+		if isinstance(datablock, bpy.types.Object) and datablock.type == 'MESH':
+			updated.add(datablock.data.as_pointer())
+		elif isinstance(datablock, bpy.types.Mesh):
+			updated.add(datablock.as_pointer())
+	for ptr in updated:
+		if ptr in pending:
+			pending.discard(ptr)
+		else:
+			cache.pop(ptr, None)
+
+
+@persistent
+def clear(*args):
+	cache.clear()
+	pending.clear()
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+	bpy.app.handlers.load_post.append(clear)
+
+
+def unregister():
+	bpy.app.handlers.load_post.remove(clear)
+	bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+	clear()
@@ -0,0 +1,69 @@
+#  selectconnectedverts/islands.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Label the islands (connected components) of a mesh with union-find,
+# done for all edges at once instead of one edge at a time: every
+# edge hooks the root with the highest index onto the one with the
+# lowest, then all paths are compressed by pointer jumping, and that
+# is repeated with the edges that still connect different roots.
+# Hooking always goes to a lower index, so no cycles can form. When
+# several edges hook the same root, it goes to the lowest of them, so
+# every root that has edges to lower roots makes progress (otherwise
+# a star with its center last would take one round per edge).
+
+import numpy as np
+
+
+def label(edges, count):
+	"""Return the island number of every vertex given an (n, 2) array of edges.
+
+	Islands are numbered from 0, in the order of their lowest vertex index.
+	"""
+	parent = np.arange(count)
+	edges = np.asarray(edges).reshape(-1, 2)
+	u, v = edges[:, 0], edges[:, 1]
+	while len(u):
+		pu, pv = parent[u], parent[v]
+		linked = pu != pv
+		u, v, pu, pv = u[linked], v[linked], pu[linked], pv[linked]
+		if len(u) == 0:
+			break
+		np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+		while True:
+			grandparent = parent[parent]
+			if np.array_equal(grandparent, parent):
+				break
+			parent = grandparent
+	# every vertex now points to the lowest vertex of its island
+	roots, islands = np.unique(parent, return_inverse=True)
+	return islands
+
+
+def stats(islands, co):
+	"""Return the vertex count and the lowest and highest coordinates of every island.
+
+	co is the (n, 3) array of vertex coordinates.
+	"""
+	if len(islands) == 0:
+		return np.zeros(0, dtype=np.int64), np.empty((0, 3), dtype=co.dtype), np.empty((0, 3), dtype=co.dtype)
+	counts = np.bincount(islands)
+	order = np.argsort(islands, kind='stable')
+	starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+	co = co[order]
+	return counts, np.minimum.reduceat(co, starts), np.maximum.reduceat(co, starts)
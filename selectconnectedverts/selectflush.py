@@ -0,0 +1,56 @@
+#  selectconnectedverts/selectflush.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# An edge or face only shows up as selected if its own select flag is
+# set, so after changing the vertex selection the edge and face flags
+# have to follow, which is what bm.select_flush(True) does for a BMesh.
+# Here it is done on the mesh arrays for all edges and faces at once,
+# so operators that work on arrays do not need a BMesh just to flush.
+
+import numpy as np
+
+from .adjacency import edge_vertices
+
+
+def flush_masks(select, edges, loop_start, loop_vertex):
+	"""Return the edge and face selection that follow from a boolean vertex selection.
+
+	An edge or face is selected if all its vertices are. edges is the
+	(n, 2) array of edge vertices, loop_start the first loop of every
+	polygon and loop_vertex the vertex of every loop.
+	"""
+	edge_select = select[edges].all(axis=1)
+	if len(loop_start) == 0:
+		return edge_select, np.zeros(0, dtype=bool)
+	return edge_select, np.logical_and.reduceat(select[loop_vertex], loop_start)
+
+
+def flush(mesh, select):
+	"""Set the vertex selection of a mesh and select the edges and faces that follow from it.
+
+	The mesh should not be in edit mode.
+	"""
+	loop_start = np.empty(len(mesh.polygons), dtype=np.int32)
+	mesh.polygons.foreach_get('loop_start', loop_start)
+	loop_vertex = np.empty(len(mesh.loops), dtype=np.int32)
+	mesh.loops.foreach_get('vertex_index', loop_vertex)
+	edge_select, face_select = flush_masks(select, edge_vertices(mesh), loop_start, loop_vertex)
+	mesh.vertices.foreach_set('select', select)
+	mesh.edges.foreach_set('select', edge_select)
+	mesh.polygons.foreach_set('select', face_select)
@@ -0,0 +1,81 @@
+#  tests/test_islands.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Checks the island labelling of selectconnectedverts against a plain
+# union-find, one edge at a time. The islands module only needs numpy.
+
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'selectconnectedverts'))
+
+import islands
+
+rng = np.random.default_rng(42)
+
+
+def brute_label(edges, count):
+	"""Return the island number of every vertex, numbered by their lowest vertex."""
+	parent = list(range(count))
+	def find(i):
+		while parent[i] != i:
+			parent[i] = parent[parent[i]]
+			i = parent[i]
+		return i
+	for u, v in edges:
+		ru, rv = find(u), find(v)
+		if ru != rv:
+			parent[max(ru, rv)] = min(ru, rv)
+	roots = [find(i) for i in range(count)]
+	numbers = {}
+	return np.array([numbers.setdefault(r, len(numbers)) for r in roots], dtype=np.int64)
+
+
+def star(count):
+	# the center has the highest index, like the apex of a cone
+	center = count - 1
+	return np.column_stack([np.arange(center), np.full(center, center)])
+
+
+CASES = {
+	'empty': (np.empty((0, 2), dtype=np.int64), 0),
+	'no edges': (np.empty((0, 2), dtype=np.int64), 5),
+	'star': (star(1000), 1000),
+	'random': (rng.integers(0, 2000, size=(1500, 2)), 2000),
+	'chain reversed': (np.column_stack([np.arange(999, 0, -1), np.arange(998, -1, -1)]), 1000),
+	'two stars': (np.concatenate([star(500), star(500)[:, ::-1] + 500]), 1000),
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_label(name):
+	edges, count = CASES[name]
+	assert np.array_equal(islands.label(edges, count), brute_label(edges.tolist(), count))
+
+
+def test_large_star_is_fast():
+	# one round per edge would take minutes
+	start = perf_counter()
+	labels = islands.label(star(200000), 200000)
+	assert perf_counter() - start < 5
+	assert np.all(labels == 0)
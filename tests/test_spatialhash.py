@@ -0,0 +1,92 @@
+#  tests/test_spatialhash.py
+#
+#  (c) 2017 - 2021 Michel Anders
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+# Checks the spatial hash of selectclosestkd against the brute force
+# reference. The proximity package does not import bpy, so this runs
+# outside Blender with just numpy and pytest installed.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'selectclosestkd'))
+
+from proximity import bruteforce
+from proximity.spatialhash import SpatialHash
+
+rng = np.random.default_rng(42)
+
+
+def sphere(n, radius=1.0):
+	points = rng.normal(size=(n, 3))
+	return points / np.linalg.norm(points, axis=1)[:, np.newaxis] * radius
+
+
+def plane(n):
+	x, y = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+	return np.column_stack([x.ravel(), y.ravel(), np.zeros(x.size)])
+
+
+CASES = {
+	'uniform': (rng.random((3000, 3)), rng.random((2000, 3))),
+	'overlapping': (rng.random((3000, 3)), rng.random((2000, 3)) + [0.5, 0, 0]),
+	'spheres': (sphere(3000), sphere(2000) + [1, 0, 0]),
+	'flat': (plane(60), rng.random((2000, 3)) * [1.2, 1.2, 0.2] - [0.1, 0.1, 0.1]),
+	'line': (np.column_stack([np.linspace(0, 1, 1000), np.zeros(1000), np.zeros(1000)]), rng.random((1000, 3))),
+	'single point': (np.array([[0.5, 0.5, 0.5]]), rng.random((500, 3))),
+	'duplicates': (np.repeat(rng.random((5, 3)), 40, axis=0), rng.random((500, 3))),
+	'out of grid': (rng.random((3000, 3)), rng.normal(size=(2000, 3)) * 10),
+	'far away': (rng.random((3000, 3)), rng.random((500, 3)) + [50, -20, 5]),
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+@pytest.mark.parametrize('fraction', [0.5, 1.0])
+def test_nearest(name, fraction):
+	# with the largest distance every query finds its nearest point
+	points, queries = CASES[name]
+	expected = bruteforce.nearest(points, queries)[1]
+	# just above a distance, so rounding cannot decide if it is found
+	max_distance = np.quantile(expected, fraction) * (1 + 1e-9)
+	index, distance = SpatialHash(points).nearest(queries, max_distance)
+	near = expected <= max_distance
+	assert np.allclose(distance[near], expected[near])
+	assert np.allclose(np.linalg.norm(points[index[near]] - queries[near], axis=1), expected[near])
+	assert np.all(index[~near] == -1)
+	assert np.all(np.isinf(distance[~near]))
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_within(name):
+	points, queries = CASES[name]
+	radius = 0.05
+	q, p, distance = SpatialHash(points).within(queries, radius)
+	d2 = bruteforce.squared_distances(queries, points)
+	expected = set(zip(*np.nonzero(d2 <= radius**2)))
+	assert set(zip(q, p)) == expected
+	assert np.allclose(distance, np.sqrt(d2[q, p]))
+
+
+def test_empty():
+	index, distance = SpatialHash(np.empty((0, 3))).nearest(rng.random((10, 3)), 0.5)
+	assert np.all(index == -1) and np.all(np.isinf(distance))
+	index, distance = SpatialHash(rng.random((10, 3))).nearest(np.empty((0, 3)), 0.5)
+	assert len(index) == len(distance) == 0
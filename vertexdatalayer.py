@@ -19,13 +19,15 @@
 
 
 import bpy, bmesh
+from bpy.props import EnumProperty, StringProperty
+import numpy as np
 
 bl_info = {
 	"name": "Vertex Custom Data",
 	"author": "Michel Anders (varkenvarken)",
-	"version": (0, 0, 202105011547),
+	"version": (0, 0, 202610182200),
 	"blender": (2, 92, 0),
-	"location": "View3D > Edit > Vertex Custom Data",
+	"location": "View3D > Object > Vertex Custom Data, View3D > Mesh > Vertex Custom Data",
 	"description": "Change/Add Vertex Custom Data",
 	"warning": "",
 	"wiki_url": "",
@@ -38,21 +40,79 @@ class VertexCustomData(bpy.types.Operator):
 	bl_label = 'Vertex Custom Data'
 	bl_options = {'REGISTER', 'UNDO'}
 
+	engine : EnumProperty(
+		name='Engine',
+		description='How to set the values in edit mode (object mode always uses numpy)',
+		items=[
+			('NUMPY', 'Numpy', 'Set all values at once with numpy (leaves and re-enters edit mode)'),
+			('BMESH', 'BMesh', 'Set the values one by one on the edit mode BMesh (slow)')
+		])
+	target : EnumProperty(
+		name='Store in',
+		items=[
+			('BEVEL_WEIGHT', 'Bevel weight', 'The bevel weight of the vertices'),
+			('ATTRIBUTE', 'Attribute', 'A float vertex attribute')
+		])
+	name : StringProperty(name='Name', default='Vertex bevel',
+		description='Name of the attribute')
+
 	@classmethod
 	def poll(self, context):
-		return (context.mode == 'EDIT_MESH')
+		return (context.mode == 'EDIT_MESH' or
+				(context.mode == 'OBJECT' and
+				context.active_object is not None and
+				context.active_object.type == 'MESH'))
 
 	def execute(self, context):
 		ob = context.active_object
+		if context.mode == 'EDIT_MESH' and self.engine == 'BMESH':
+			self.execute_bmesh(ob)
+		elif context.mode == 'EDIT_MESH':
+			# leaving edit mode writes the bmesh to the mesh
+			bpy.ops.object.mode_set(mode='OBJECT')
+			self.execute_numpy(ob.data)
+			bpy.ops.object.mode_set(mode='EDIT')
+		else:
+			self.execute_numpy(ob.data)
+			ob.data.update()
+		return {"FINISHED"}
+
+	def execute_numpy(self, me):
+		count = len(me.vertices)
+		co = np.empty(count * 3, dtype=np.float32)
+		me.vertices.foreach_get('co', co)
+		mask = co.reshape(count, 3)[:, 0] > 0
+		if self.target == 'BEVEL_WEIGHT':
+			me.use_customdata_vertex_bevel = True
+			values = np.empty(count, dtype=np.float32)
+			me.vertices.foreach_get('bevel_weight', values)
+			values[mask] = 1.0
+			me.vertices.foreach_set('bevel_weight', values)
+		else:
+			attribute = me.attributes.get(self.name)
+			if attribute is not None and (attribute.data_type != 'FLOAT' or attribute.domain != 'POINT'):
+				me.attributes.remove(attribute)
+				attribute = None
+			values = np.zeros(count, dtype=np.float32)
+			if attribute is None:
+				attribute = me.attributes.new(self.name, 'FLOAT', 'POINT')
+			else:
+				attribute.data.foreach_get('value', values)
+			values[mask] = 1.0
+			attribute.data.foreach_set('value', values)
+
+	def execute_bmesh(self, ob):
 		# mesh must be in edit mode!
 		bm = bmesh.from_edit_mesh(ob.data)
-		bl = bm.verts.layers.bevel_weight.new('Vertex bevel')
+		if self.target == 'BEVEL_WEIGHT':
+			bl = bm.verts.layers.bevel_weight.new('Vertex bevel')
+		else:
+			bl = bm.verts.layers.float.get(self.name) or bm.verts.layers.float.new(self.name)
 		for v in bm.verts:
 			if v.co.x > 0:
 				v[bl] = 1.0
 
 		bmesh.update_edit_mesh(ob.data)
-		return {"FINISHED"}
 
 
 def menu_func(self, context):
@@ -69,8 +129,10 @@ register_classes, unregister_classes = bpy.utils.register_classes_factory(classe
 def register():
 	register_classes()
 	bpy.types.VIEW3D_MT_edit_mesh.append(menu_func)
+	bpy.types.VIEW3D_MT_object.append(menu_func)
 
 
 def unregister():
+	bpy.types.VIEW3D_MT_object.remove(menu_func)
 	bpy.types.VIEW3D_MT_edit_mesh.remove(menu_func)
 	unregister_classes()